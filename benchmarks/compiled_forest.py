@@ -0,0 +1,57 @@
+"""
+Latency of the compiled flat-array forest against RandomForestRegressor.predict,
+for a single applicant and a 10k-row batch.
+
+    python -m benchmarks.compiled_forest --rows 20000 --features 40 --trees 100
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from src.compiled_forest import FlatTreeEnsemble
+
+
+def best_time(fn, repeat: int) -> float:
+    """Best wall-clock seconds of `repeat` calls."""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--features", type=int, default=40)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.random((args.rows, args.features))
+    y = X @ rng.random(args.features) + rng.normal(scale=0.1, size=args.rows)
+    model = RandomForestRegressor(n_estimators=args.trees, max_depth=args.max_depth, n_jobs=-1, random_state=0)
+    model.fit(X, y)
+    model.set_params(n_jobs=1)
+    compiled = FlatTreeEnsemble.from_model(model)
+
+    batch = X[:10_000]
+    max_error = np.abs(compiled.predict(batch) - model.predict(batch)).max()
+    assert np.allclose(compiled.predict(batch), model.predict(batch), rtol=1e-5, atol=1e-5), max_error
+    print("max abs difference: {:.2e}, compiled size: {:.1f} MB".format(max_error, compiled.nbytes / 1e6))
+
+    row = X[:1]
+    for name, rows in (("single row", row), ("10k rows", batch)):
+        sklearn_time = best_time(lambda: model.predict(rows), args.repeat)
+        compiled_time = best_time(lambda: compiled.predict(rows), args.repeat)
+        print("{:<10}  sklearn {:9.3f} ms  compiled {:9.3f} ms  speedup {:5.1f}x".format(
+            name, sklearn_time * 1e3, compiled_time * 1e3, sklearn_time / compiled_time))
+
+
+if __name__ == "__main__":
+    main()
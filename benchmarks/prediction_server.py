@@ -0,0 +1,105 @@
+"""
+Cold start and request latency of the built-in prediction server against
+`mlflow models serve`, both started as subprocesses on the same model.
+
+    python -m benchmarks.prediction_server --model-uri runs:/<run_id>/deployed_model --mlflow
+
+With --concurrency N the requests are sent from N client threads, and with
+--max-batch-rows the built-in server coalesces them into batched predicts.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.prediction_server import load_model, resolve_model_path
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float) -> float:
+    """Seconds until `url` answers 200, polling every 10 ms."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited with code {}".format(process.returncode))
+        try:
+            if requests.get(url, timeout=0.5).status_code == 200:
+                return time.perf_counter() - start
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError("Server not ready after {}s".format(timeout))
+
+
+def request_latencies(url: str, payload: dict, n_requests: int) -> np.ndarray:
+    """Milliseconds per request over one keep-alive session."""
+    latencies = np.empty(n_requests)
+    with requests.Session() as session:
+        for i in range(n_requests):
+            start = time.perf_counter()
+            response = session.post(url, json=payload)
+            latencies[i] = time.perf_counter() - start
+            response.raise_for_status()
+    return latencies * 1e3
+
+
+def concurrent_latencies(url: str, payload: dict, n_requests: int, concurrency: int):
+    """Milliseconds per request and requests per second, from `concurrency` client threads."""
+    per_client = max(1, n_requests // concurrency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(lambda _: request_latencies(url, payload, per_client), range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return np.concatenate(latencies), per_client * concurrency / elapsed
+
+
+def run(name: str, command, base_url: str, ready_path: str, payload: dict, args) -> None:
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        cold_start = wait_until_ready(base_url + ready_path, process, args.timeout)
+        latencies, rate = concurrent_latencies(base_url + "/invocations", payload, args.requests, args.concurrency)
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print("{:<10} cold start {:7.2f} s  p50 {:7.2f} ms  p99 {:7.2f} ms  {:8.1f} req/s".format(
+            name, cold_start, p50, p99, rate))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-uri", required=True)
+    parser.add_argument("--rows", type=int, default=1, help="rows per request")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads")
+    parser.add_argument("--max-batch-rows", type=int, default=None, help="micro-batch size of the built-in server")
+    parser.add_argument("--port", type=int, default=5105)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--mlflow", action="store_true", help="also benchmark `mlflow models serve`")
+    args = parser.parse_args()
+
+    model_path = resolve_model_path(args.model_uri)
+    columns = list(getattr(load_model(model_path), "feature_names_in_", []))
+    if not columns:
+        sys.exit("The model does not record its feature names")
+    frame = pd.DataFrame(np.zeros((args.rows, len(columns))), columns=columns)
+    payload = {"dataframe_split": frame.to_dict(orient="split")}
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, os.path.join(repo_root, "run_server.py"), "--model-uri", model_path,
+               "--port", str(args.port)]
+    if args.max_batch_rows:
+        command += ["--max-batch-rows", str(args.max_batch_rows)]
+    run("built-in", command, "http://127.0.0.1:{}".format(args.port), "/ready", payload, args)
+    if args.mlflow:
+        run("mlflow", ["mlflow", "models", "serve", "--model-uri", model_path, "--port", str(args.port + 1),
+                       "--env-manager", "local"], "http://127.0.0.1:{}".format(args.port + 1), "/ping", payload, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+JSON against binary (.npy, Arrow IPC) request bodies of the built-in prediction server,
+at 1, 1k and 100k rows: server-side decoding into the model's input matrix, and the
+full round trip (client encoding, request, prediction, response decoding).
+
+    python -m benchmarks.request_formats --model-uri runs:/<run_id>/deployed_model
+
+Without --model-uri a random forest is fitted on random data.
+"""
+import argparse
+import io
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import requests
+from sklearn.ensemble import RandomForestRegressor
+
+from benchmarks.prediction_server import wait_until_ready
+from src.prediction_server import (
+    ARROW_STREAM_CONTENT_TYPE,
+    NPY_CONTENT_TYPE,
+    PredictionService,
+    load_model,
+    parse_request,
+    resolve_model_path,
+)
+
+
+def encode_json_records(frame: pd.DataFrame) -> bytes:
+    return json.dumps({"dataframe_records": frame.to_dict(orient="records")}).encode()
+
+
+def encode_json_split(frame: pd.DataFrame) -> bytes:
+    return json.dumps({"dataframe_split": frame.to_dict(orient="split")}).encode()
+
+
+def encode_npy(frame: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, frame.to_numpy(dtype=np.float32), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def encode_arrow(frame: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_json(body: bytes) -> np.ndarray:
+    return np.asarray(json.loads(body)["predictions"])
+
+
+def decode_npy(body: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(body), allow_pickle=False)
+
+
+def decode_arrow(body: bytes) -> np.ndarray:
+    return pa.ipc.open_stream(pa.py_buffer(body)).read_all().column("predictions").to_numpy()
+
+
+# name: (request content type, request encoder, response decoder)
+FORMATS = {
+    "json records": ("application/json", encode_json_records, decode_json),
+    "json split": ("application/json", encode_json_split, decode_json),
+    "npy": (NPY_CONTENT_TYPE, encode_npy, decode_npy),
+    "arrow": (ARROW_STREAM_CONTENT_TYPE, encode_arrow, decode_arrow),
+}
+
+
+def best_time(fn, repeat: int) -> float:
+    """Best wall-clock seconds of `repeat` calls."""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_model(path: str, features: int) -> str:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((5000, features)), columns=["f{}".format(j) for j in range(features)])
+    y = X.to_numpy() @ rng.random(features)
+    model = RandomForestRegressor(n_estimators=50, max_depth=12, n_jobs=1, random_state=0).fit(X, y)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-uri", default=None)
+    parser.add_argument("--features", type=int, default=32, help="features of the synthetic model")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5106)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.model_uri:
+            model_path = resolve_model_path(args.model_uri)
+        else:
+            model_path = synthetic_model(os.path.join(tmp_dir, "model.pkl"), args.features)
+        service = PredictionService(load_model(model_path))
+        if service.feature_names is None:
+            sys.exit("The model does not record its feature names")
+
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(repo_root, "run_server.py"), "--model-uri", model_path,
+             "--port", str(args.port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        url = "http://127.0.0.1:{}".format(args.port)
+        try:
+            wait_until_ready(url + "/ready", process, args.timeout)
+            rng = np.random.default_rng(1)
+            with requests.Session() as session:
+                for rows in args.rows:
+                    frame = pd.DataFrame(rng.random((rows, len(service.feature_names))), columns=service.feature_names)
+                    for name, (content_type, encode, decode) in FORMATS.items():
+                        body = encode(frame)
+                        decode_time = best_time(lambda: service.prepare(parse_request(body, content_type)), args.repeat)
+
+                        def round_trip():
+                            response = session.post(
+                                url + "/invocations",
+                                data=encode(frame),
+                                headers={"Content-Type": content_type, "Accept": content_type},
+                            )
+                            response.raise_for_status()
+                            return decode(response.content)
+
+                        round_trip_time = best_time(round_trip, args.repeat)
+                        print("{:>7} rows  {:<12}  body {:10.1f} KB  decode {:9.3f} ms  round trip {:9.3f} ms".format(
+                            rows, name, len(body) / 1e3, decode_time * 1e3, round_trip_time * 1e3))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import logging
+from typing import Optional
+
 import pandas as pd
 import numpy as np
 
@@ -8,32 +11,20 @@ from zenml.integrations.constants import MLFLOW
 from zenml.integrations.mlflow.steps.mlflow_deployer import mlflow_model_deployer_step
 from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
 
-from pydantic import BaseModel
-
-from steps.ingest_data import ingest_df
-from steps.clean_data import clean_df
+from steps.clean_data import clean_increment_df, ingest_and_clean_df
+from steps.compress_model import compress_model, select_model
+from steps.deployment_trigger import DeploymentTriggerConfig, deployment_trigger
+from steps.cross_validate import cross_validate
 from steps.evaluation import evaluate_model
 from steps.model_train import train_model
-from steps.config import ModelNameConfig
+from steps.select_features import select_features
+from steps.tune_model import tune_model
+from steps.config import CrossValidationConfig, ModelNameConfig, TuningConfig
+from pipelines.utils import can_update_deployed_model, deployed_model_uri
 
 # Enable MLflow integration in Dockerized step execution
 docker_settings = DockerSettings(required_integrations=[MLFLOW])
 
-# ---------------------
-# Deployment Trigger Step
-# ---------------------
-
-class DeploymentTriggerConfig(BaseModel):
-    min_accuracy: float = 0.60
-
-@step
-def deployment_trigger(
-    accuracy: float,
-    config: DeploymentTriggerConfig
-) -> bool:
-    """Decide whether to deploy model based on accuracy threshold."""
-    return accuracy >= config.min_accuracy
-
 # ---------------------
 # Deployment Pipeline
 # ---------------------
@@ -42,19 +33,79 @@ def deployment_trigger(
 def continuous_deployment_pipeline(
     data_path: str,
     min_accuracy: float = 0.60,
+    model_name: str = "RandomForest",
+    tune: bool = False,
+    tuning_budget: float = 600.0,
+    feature_selection: bool = False,
+    cv_folds: int = 0,
+    incremental: bool = False,
+    new_data_path: Optional[str] = None,
+    n_new_estimators: int = 50,
+    max_r2_drop: float = 0.01,
+    use_lower_bound: bool = False,
+    max_latency_p99_ms: Optional[float] = None,
+    max_size_bytes: Optional[float] = None,
+    min_throughput_rows_per_s: Optional[float] = None,
     workers: int = 1,
     timeout: int = DEFAULT_SERVICE_START_STOP_TIMEOUT,
 ):
-    """Full training and deployment pipeline."""
-    df = ingest_df(data_path=data_path)
-    X_train, X_test, y_train, y_test = clean_df(df)
-    model_config = ModelNameConfig(model_name="RandomForest")
-    model = train_model(X_train, X_test, y_train, y_test, config=model_config)
-    r2, rmse = evaluate_model(model, X_test, y_test)
-    should_deploy = deployment_trigger(accuracy=r2, config=DeploymentTriggerConfig(min_accuracy=min_accuracy))
+    """
+    Full training and deployment pipeline. With `incremental`, the deployed model is
+    updated with the rows at `new_data_path` instead of being retrained on all the data.
+    """
+    base_model_uri = deployed_model_uri() if incremental else None
+    if incremental and base_model_uri is None:
+        logging.warning("No deployed model to update, training from scratch")
+    elif base_model_uri is not None and not can_update_deployed_model(base_model_uri, model_name):
+        logging.warning("The deployed model is not a {} model that can be updated, training from scratch".format(model_name))
+        base_model_uri = None
+    if base_model_uri is not None:
+        X_train, X_test, y_train, y_test, preprocessor = clean_increment_df(
+            data_path=new_data_path or data_path, base_model_uri=base_model_uri
+        )
+    else:
+        X_train, X_test, y_train, y_test, preprocessor = ingest_and_clean_df(data_path=data_path)
+    model_config = ModelNameConfig(
+        model_name=model_name,
+        incremental=base_model_uri is not None,
+        base_model_uri=base_model_uri,
+        n_new_estimators=n_new_estimators,
+    )
+    # An incremental update keeps the deployed model's columns, already selected by its preprocessor
+    if feature_selection and base_model_uri is None:
+        X_train, X_test, preprocessor = select_features(X_train, X_test, y_train, preprocessor, model_config=model_config)
+    hyperparameters = None
+    if tune and base_model_uri is None:
+        hyperparameters = tune_model(X_train, y_train, model_config=model_config, config=TuningConfig(time_budget=tuning_budget))
+    if cv_folds and base_model_uri is None:
+        cross_validate(
+            X_train, y_train, model_config=model_config,
+            config=CrossValidationConfig(n_splits=cv_folds), hyperparameters=hyperparameters,
+        )
+    model = train_model(
+        X_train, X_test, y_train, y_test,
+        config=model_config, preprocessor=preprocessor, hyperparameters=hyperparameters,
+    )
+    r2, rmse, r2_lower = evaluate_model(model, X_test, y_test, preprocessor=preprocessor)
+    variants = compress_model(model, X_train, X_test, y_train, y_test, incremental=base_model_uri is not None)
+    should_deploy, selected_variant = deployment_trigger(
+        config=DeploymentTriggerConfig(
+            min_accuracy=min_accuracy,
+            max_r2_drop=max_r2_drop,
+            use_lower_bound=use_lower_bound,
+            max_latency_p99_ms=max_latency_p99_ms,
+            max_size_bytes=max_size_bytes,
+            min_throughput_rows_per_s=min_throughput_rows_per_s,
+        ),
+        variants=variants,
+        r2_lower=r2_lower,
+        incremental=base_model_uri is not None,
+    )
+    deployed_model = select_model(variants, selected_variant)
     mlflow_model_deployer_step(
-        model=model,
+        model=deployed_model,
         deploy_decision=should_deploy,
+        model_name="deployed_model",
         workers=workers,
         timeout=timeout,
     )
\ No newline at end of file
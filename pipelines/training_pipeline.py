@@ -1,14 +1,29 @@
 from zenml import pipeline
-from steps.ingest_data import ingest_df
-from steps.clean_data import clean_df
+from steps.clean_data import ingest_and_clean_df
+from steps.cross_validate import cross_validate
 from steps.evaluation import evaluate_model
 from steps.model_train import train_model
-from steps.config import ModelNameConfig
+from steps.select_features import select_features
+from steps.tune_model import tune_model
+from steps.config import CrossValidationConfig, ModelNameConfig, TuningConfig
 
 @pipeline(enable_cache=False)
-def train_pipeline(data_path: str, model_name: str = "RandomForest"):
-    df = ingest_df(data_path)
-    X_train, X_test, y_train, y_test = clean_df(df)
-    model_config = ModelNameConfig(model_name="RandomForest")
-    model = train_model(X_train, X_test, y_train, y_test, config=model_config)
-    r2, rmse = evaluate_model(model, X_test, y_test)
\ No newline at end of file
+def train_pipeline(data_path: str, model_name: str = "RandomForest", tune: bool = False, tuning_budget: float = 600.0,
+                   feature_selection: bool = False, cv_folds: int = 0):
+    X_train, X_test, y_train, y_test, preprocessor = ingest_and_clean_df(data_path=data_path)
+    model_config = ModelNameConfig(model_name=model_name)
+    if feature_selection:
+        X_train, X_test, preprocessor = select_features(X_train, X_test, y_train, preprocessor, model_config=model_config)
+    hyperparameters = None
+    if tune:
+        hyperparameters = tune_model(X_train, y_train, model_config=model_config, config=TuningConfig(time_budget=tuning_budget))
+    if cv_folds:
+        cross_validate(
+            X_train, y_train, model_config=model_config,
+            config=CrossValidationConfig(n_splits=cv_folds), hyperparameters=hyperparameters,
+        )
+    model = train_model(
+        X_train, X_test, y_train, y_test,
+        config=model_config, preprocessor=preprocessor, hyperparameters=hyperparameters,
+    )
+    r2, rmse, r2_lower = evaluate_model(model, X_test, y_test, preprocessor=preprocessor)
\ No newline at end of file
@@ -1,19 +1,62 @@
 import logging
+import os
+
+from typing import Optional
 
 import pandas as pd
-from src.data_cleaning import DataCleaning, DataDivideStrategy, DataPreProcessStrategy
+from src.data_cleaning import PREPROCESSOR_PATH, TARGET_COLUMN, DataCleaning, DataPreProcessor, DataPreProcessStrategy
 
 
 def get_data_for_test():
     try:
         df = pd.read_csv("data/train/train.csv")
+        # Score with the preprocessor fitted during training instead of refitting on the sample
+        if os.path.exists(PREPROCESSOR_PATH):
+            preprocessor = DataPreProcessor.load(PREPROCESSOR_PATH)
+        else:
+            preprocessor = DataPreProcessor().fit(df)
         df = df.sample(n=100)
-        preprocess_strategy = DataPreProcessStrategy()
+        df.drop([TARGET_COLUMN], axis=1, inplace=True)
+        preprocess_strategy = DataPreProcessStrategy(preprocessor)
         data_cleaning = DataCleaning(df, preprocess_strategy)
         df = data_cleaning.handle_data()
-        df.drop(["Loan Sanction Amount (USD)"], axis=1, inplace=True)
         result = df.to_json(orient="split")
         return result
     except Exception as e:
         logging.error(e)
-        raise e
\ No newline at end of file
+        raise e
+
+
+def deployed_model_uri(
+    pipeline_name: str = "continuous_deployment_pipeline",
+    pipeline_step_name: str = "mlflow_model_deployer_step",
+) -> Optional[str]:
+    """
+    URI of the model currently served by the MLflow model deployer, None if no model
+    has been deployed yet
+    """
+    from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
+
+    model_deployer = MLFlowModelDeployer.get_active_model_deployer()
+    services = model_deployer.find_model_server(
+        pipeline_name=pipeline_name,
+        pipeline_step_name=pipeline_step_name,
+    )
+    if not services:
+        return None
+    return services[0].config.model_uri
+
+
+def can_update_deployed_model(model_uri: str, model_name: str) -> bool:
+    """
+    Whether the deployed model at `model_uri` can be updated incrementally as a
+    `model_name` model, False when e.g. a distilled student of another class was deployed
+    """
+    import mlflow
+
+    from src.model_dev import MODELS, IncrementalModel
+
+    model = MODELS[model_name]()
+    if not isinstance(model, IncrementalModel):
+        return False
+    return model.can_update(mlflow.sklearn.load_model(model_uri))
@@ -0,0 +1,86 @@
+import logging
+import os
+from typing import Optional, Tuple
+
+import click
+
+from src.batch_scoring import BatchScorer
+from src.data_schema import USE_COLUMNS
+from steps.ingest_data import IngestData
+
+
+@click.command()
+@click.option("--input", "input_path", required=True, help="CSV or Parquet file of applicants to score.")
+@click.option("--output", "output_dir", required=True, help="Directory the Parquet predictions are written to.")
+@click.option(
+    "--model-uri",
+    default=None,
+    help="MLflow model URI (runs:/<run_id>/deployed_model), model directory or pickle file, "
+         "defaults to the deployed model.",
+)
+@click.option(
+    "--preprocessor",
+    default=None,
+    help="Preprocessor URI or file, by default the one logged next to the model.",
+)
+@click.option("--chunksize", default=100_000, help="Rows read and scored at a time.")
+@click.option("--workers", default=None, type=int, help="Worker processes, defaults to all cores.")
+@click.option(
+    "--max-pending",
+    default=None,
+    type=int,
+    help="Chunks held in memory at a time, defaults to twice the workers.",
+)
+@click.option(
+    "--id-column",
+    "id_columns",
+    multiple=True,
+    default=["Customer ID"],
+    help="Input column copied to the output, repeatable.",
+)
+@click.option("--restart", is_flag=True, default=False, help="Discard a previous run's output instead of resuming it.")
+def run_batch_scoring(
+    input_path: str,
+    output_dir: str,
+    model_uri: Optional[str],
+    preprocessor: Optional[str],
+    chunksize: int,
+    workers: Optional[int],
+    max_pending: Optional[int],
+    id_columns: Tuple[str, ...],
+    restart: bool,
+):
+    """Score a file of applicants with the deployed model, resuming an interrupted run."""
+    logging.basicConfig(level=logging.INFO)
+    if model_uri is None:
+        from pipelines.utils import deployed_model_uri
+
+        model_uri = deployed_model_uri()
+        if model_uri is None:
+            raise click.UsageError("No model is deployed, pass --model-uri")
+
+    columns = USE_COLUMNS + [col for col in id_columns if col not in USE_COLUMNS]
+    stat = os.stat(input_path)
+    scorer = BatchScorer(
+        lambda: IngestData(input_path, columns=columns, chunksize=chunksize).iter_chunks(),
+        model_uri,
+        output_dir,
+        preprocessor_path=preprocessor,
+        id_columns=list(id_columns),
+        n_workers=workers,
+        max_pending=max_pending,
+        fingerprint={
+            "input": os.path.abspath(input_path),
+            "input_size": stat.st_size,
+            "input_mtime": stat.st_mtime,
+            "chunksize": chunksize,
+        },
+    )
+    if restart:
+        scorer.restart()
+    checkpoint = scorer.run()
+    print("Scored {} rows into {}".format(checkpoint["rows"], output_dir))
+
+
+if __name__ == "__main__":
+    run_batch_scoring()
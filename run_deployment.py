@@ -1,9 +1,9 @@
-import os
-import platform
 import click
 from rich import print
 from zenml.integrations.mlflow.mlflow_utils import get_tracking_uri
-from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
+
+from pipelines.utils import deployed_model_uri
+from src.prediction_server import DEFAULT_PORT, serve
 
 # Import only the deployment pipeline
 from pipelines.deployment_pipeline import continuous_deployment_pipeline
@@ -24,7 +24,44 @@ DEPLOY_AND_PREDICT = "deploy_and_predict"  # kept only for CLI compatibility
     default=0.60,
     help="Minimum accuracy required to deploy the model.",
 )
-def run_deployment(config: str, min_accuracy: float):
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Update the deployed model with new data instead of retraining from scratch.",
+)
+@click.option(
+    "--new-data-path",
+    default=None,
+    help="New rows used by --incremental, defaults to the training data.",
+)
+@click.option(
+    "--use-lower-bound",
+    is_flag=True,
+    default=False,
+    help="Require the lower bound of the bootstrap R² interval to reach --min-accuracy.",
+)
+@click.option(
+    "--max-latency-ms",
+    type=float,
+    default=None,
+    help="Reject models whose p99 single-row latency exceeds this many milliseconds.",
+)
+@click.option(
+    "--max-size-mb",
+    type=float,
+    default=None,
+    help="Reject models whose serialized size exceeds this many megabytes.",
+)
+def run_deployment(
+    config: str,
+    min_accuracy: float,
+    incremental: bool,
+    new_data_path: str,
+    use_lower_bound: bool,
+    max_latency_ms: float,
+    max_size_mb: float,
+):
     """Run the ZenML deployment pipeline with MLflow integration."""
     deploy = config in [DEPLOY, DEPLOY_AND_PREDICT]
 
@@ -33,35 +70,31 @@ def run_deployment(config: str, min_accuracy: float):
         continuous_deployment_pipeline(
             data_path="data/train/train.csv",
             min_accuracy=min_accuracy,
+            incremental=incremental,
+            new_data_path=new_data_path,
+            use_lower_bound=use_lower_bound,
+            max_latency_p99_ms=max_latency_ms,
+            max_size_bytes=max_size_mb * 1024 ** 2 if max_size_mb is not None else None,
             workers=1,
             timeout=60,
         )
 
-        if platform.system() == "Windows":
-            print("\n[bold red] Daemon-based model serving is not supported on Windows.[/bold red]")
-            print("[bold yellow] Your pipeline ran successfully and the model met the accuracy threshold.[/bold yellow]")
-            print("[bold cyan] Please manually serve your model using MLflow CLI.[/bold cyan]")
-            print("\nExample:")
-            print("[green]mlflow models serve --model-uri \"runs:/<your_run_id>/model\" --port 5005 --env-manager=local[/green]")
-            print("💡 Replace `<your_run_id>` with the actual MLflow run ID shown in the MLflow UI.")
-            print("You can inspect runs using:\n"
-                  f"[italic green]    mlflow ui --backend-store-uri '{get_tracking_uri()}'[/italic green]\n")
+        model_uri = deployed_model_uri()
+        if model_uri is None:
+            print("[bold red] No deployed model found. Deployment may have failed or was skipped.[/bold red]")
             return
-        else:
-            model_deployer = MLFlowModelDeployer.get_active_model_deployer()
-            services = model_deployer.find_model_server(
-                pipeline_name="continuous_deployment_pipeline",
-                pipeline_step_name="mlflow_model_deployer_step"
-            )
 
-            if not services:
-                print("[bold red] No model server found. Deployment may have failed or was skipped.[/bold red]")
-                return
+        print_tracking_hint()
+        # The built-in server loads the model once in this process, no daemon or
+        # environment is created, so it works the same on Windows
+        print(f"[bold green] Serving model {model_uri} at http://127.0.0.1:{DEFAULT_PORT}/invocations[/bold green]")
+        serve(model_uri, port=DEFAULT_PORT)
+        return
+
+    print_tracking_hint()
 
-            model_uri = services[0].predictor.model_uri
-            print(f"[bold green] Deploying MLflow model at {model_uri}[/bold green]")
-            os.system(f'mlflow models serve --model-uri "{model_uri}" --port 5000')
 
+def print_tracking_hint():
     print(
         "You can now run:\n"
         f"[italic green]    mlflow ui --backend-store-uri '{get_tracking_uri()}'[/italic green]\n"
@@ -0,0 +1,58 @@
+from typing import Optional
+
+import click
+
+from src.prediction_server import DEFAULT_PORT, serve
+
+
+@click.command()
+@click.option(
+    "--model-uri",
+    required=True,
+    help="MLflow model URI (runs:/<run_id>/deployed_model), model directory or pickle file.",
+)
+@click.option("--host", default="127.0.0.1", help="Interface to bind.")
+@click.option("--port", default=DEFAULT_PORT, help="Port to serve /invocations on.")
+@click.option(
+    "--max-batch-rows",
+    default=None,
+    type=int,
+    help="Coalesce concurrent requests into one predict of up to this many rows.",
+)
+@click.option(
+    "--max-wait-ms",
+    default=2.0,
+    help="Longest a request waits for others to join its batch, in milliseconds.",
+)
+@click.option(
+    "--preprocessor",
+    default=None,
+    help="Preprocessor URI or file for raw requests on /predict, by default the one logged next to the model.",
+)
+@click.option("--cache-size", default=10_000, help="Rows whose predictions are cached, 0 disables the cache.")
+@click.option("--cache-ttl", default=300.0, help="Seconds a cached prediction is reused for.")
+def run_server(
+    model_uri: str,
+    host: str,
+    port: int,
+    max_batch_rows: Optional[int],
+    max_wait_ms: float,
+    preprocessor: Optional[str],
+    cache_size: int,
+    cache_ttl: float,
+):
+    """Serve the model with the built-in prediction server."""
+    serve(
+        model_uri,
+        host=host,
+        port=port,
+        max_batch_rows=max_batch_rows,
+        max_wait_ms=max_wait_ms,
+        preprocessor_path=preprocessor,
+        cache_size=cache_size,
+        cache_ttl=cache_ttl,
+    )
+
+
+if __name__ == "__main__":
+    run_server()
@@ -0,0 +1,212 @@
+import glob
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from src.data_cleaning import DataPreProcessor, preprocessor_uri
+from src.prediction_server import PredictionService, load_model, resolve_model_path
+
+PREDICTION_COLUMN = "prediction"
+CHECKPOINT_FILE = "_checkpoint.json"
+
+# Model and preprocessor of a scoring worker, loaded once by init_worker
+_service: Optional[PredictionService] = None
+
+
+def load_service(model_path: str, preprocessor_path: str) -> PredictionService:
+    """Loads the model and its preprocessor."""
+    return PredictionService(load_model(model_path), DataPreProcessor.load(preprocessor_path))
+
+
+def init_worker(model_path: str, preprocessor_path: str) -> None:
+    """
+    Loads the model and preprocessor once per pool worker process, single-threaded
+    since the workers are the parallelism
+    """
+    global _service
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+    _service = load_service(model_path, preprocessor_path)
+    if hasattr(_service.model, "n_jobs"):
+        _service.model.set_params(n_jobs=1)
+
+
+def score_chunk(
+    chunk: pd.DataFrame, id_columns: List[str], service: Optional[PredictionService] = None
+) -> pd.DataFrame:
+    """
+    Encodes the raw applicants of a chunk and predicts them
+
+    Args:
+        chunk: raw applicant rows
+        id_columns: columns copied to the output next to the prediction
+        service: model and preprocessor, the worker's own (see init_worker) if None
+    Returns:
+        pd.DataFrame: the id columns and the prediction of every row
+    """
+    service = service or _service
+    output = chunk[[col for col in id_columns if col in chunk.columns]].reset_index(drop=True)
+    output[PREDICTION_COLUMN] = service.predict(chunk, raw=True)
+    return output
+
+
+class BatchScorer:
+    """
+    Scores a file of raw applicants chunk by chunk in a process pool and writes the
+    predictions as one Parquet part per chunk, so files of any size are scored in
+    bounded memory: besides the chunk being read, at most `max_pending` chunks (and
+    their predictions) are held at a time, whatever the number of rows.
+
+    Progress is checkpointed after every part; a rerun on the same input, model and
+    chunk size resumes after the last written part.
+    """
+    def __init__(
+        self,
+        chunks: Callable[[], Iterable[pd.DataFrame]],
+        model_uri: str,
+        output_dir: str,
+        preprocessor_path: Optional[str] = None,
+        id_columns: Optional[List[str]] = None,
+        n_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        fingerprint: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            chunks: returns an iterator over the raw applicant chunks, in the same order
+                and with the same chunk size on every call
+            model_uri: MLflow model URI, model directory or pickle file
+            output_dir: directory the Parquet parts and the checkpoint are written to
+            preprocessor_path: preprocessor URI or file, by default the one logged next to the model
+            id_columns: input columns copied to the output, e.g. the customer id
+            n_workers: worker processes, all cores if None, in-process if 1
+            max_pending: chunks submitted and not yet written, 2 * n_workers if None
+            fingerprint: identifies the input and settings next to the model, preprocessor
+                and id columns, a checkpoint written with a different fingerprint is not resumed
+        """
+        self.chunks = chunks
+        self.model_uri = model_uri
+        self.output_dir = output_dir
+        self.preprocessor_path = preprocessor_path
+        self.id_columns = id_columns or []
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.n_workers
+        # The preprocessor and id columns decide the encoding and the schema of the parts
+        self.fingerprint = {
+            "model_uri": model_uri,
+            "preprocessor_path": preprocessor_path,
+            "id_columns": self.id_columns,
+            **(fingerprint or {}),
+        }
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.output_dir, CHECKPOINT_FILE)
+
+    def part_path(self, index: int) -> str:
+        return os.path.join(self.output_dir, "part-{:06d}.parquet".format(index))
+
+    def load_checkpoint(self) -> Dict[str, Any]:
+        """
+        The checkpoint of a previous run with the same fingerprint, or an empty one
+        """
+        empty = {"fingerprint": self.fingerprint, "chunks": 0, "rows": 0, "complete": False}
+        if not os.path.exists(self.checkpoint_path):
+            return empty
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("fingerprint") != self.fingerprint:
+            raise ValueError("{} holds the output of another input, model, preprocessor, id columns "
+                             "or chunk size, use another output directory or restart".format(self.output_dir))
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        # Replaced atomically, a crash leaves the previous checkpoint
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def restart(self) -> None:
+        """Removes the parts and checkpoint of a previous run."""
+        for path in glob.glob(os.path.join(self.output_dir, "part-*.parquet*")) + [self.checkpoint_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Scores the chunks not scored by a previous run
+
+        Returns:
+            Dict[str, Any]: the final checkpoint, with the chunks and rows written
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        checkpoint = self.load_checkpoint()
+        if checkpoint["complete"]:
+            logging.info("{} is already complete, {} rows".format(self.output_dir, checkpoint["rows"]))
+            return checkpoint
+        # Parts written after the last checkpoint are rewritten
+        for path in glob.glob(os.path.join(self.output_dir, "part-*.parquet*")):
+            name = os.path.basename(path)
+            if name.endswith(".tmp") or int(name[len("part-"):len("part-") + 6]) >= checkpoint["chunks"]:
+                os.remove(path)
+        if checkpoint["chunks"]:
+            logging.info("Resuming after {} chunks, {} rows".format(checkpoint["chunks"], checkpoint["rows"]))
+
+        model_path = resolve_model_path(self.model_uri)
+        preprocessor_path = resolve_model_path(self.preprocessor_path or preprocessor_uri(self.model_uri))
+        start = time.perf_counter()
+        rows = 0
+        index = checkpoint["chunks"]
+        for scored in self._scored_chunks(model_path, preprocessor_path, checkpoint["chunks"]):
+            self._write_part(index, scored)
+            index += 1
+            rows += len(scored)
+            checkpoint["chunks"] = index
+            checkpoint["rows"] += len(scored)
+            self.save_checkpoint(checkpoint)
+            logging.info("Scored chunk {}, {} rows, {:.0f} rows/s".format(
+                index, checkpoint["rows"], rows / (time.perf_counter() - start)))
+        checkpoint["complete"] = True
+        self.save_checkpoint(checkpoint)
+        logging.info("Scored {} rows into {}".format(checkpoint["rows"], self.output_dir))
+        return checkpoint
+
+    def _pending_chunks(self, skip: int) -> Iterator[pd.DataFrame]:
+        for index, chunk in enumerate(self.chunks()):
+            if index >= skip:
+                yield chunk
+
+    def _scored_chunks(self, model_path: str, preprocessor_path: str, skip: int) -> Iterator[pd.DataFrame]:
+        """Scored chunks in input order, with at most `max_pending` chunks in flight."""
+        if self.n_workers == 1:
+            # In-process, the caller's thread pools are left as they are
+            service = load_service(model_path, preprocessor_path)
+            for chunk in self._pending_chunks(skip):
+                yield score_chunk(chunk, self.id_columns, service)
+            return
+        with ProcessPoolExecutor(self.n_workers, initializer=init_worker,
+                                 initargs=(model_path, preprocessor_path)) as pool:
+            pending = deque()
+            for chunk in self._pending_chunks(skip):
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(score_chunk, chunk, self.id_columns))
+            while pending:
+                yield pending.popleft().result()
+
+    def _write_part(self, index: int, scored: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Written under a temporary name and renamed, a crash never leaves a partial part
+        path = self.part_path(index)
+        pq.write_table(pa.Table.from_pandas(scored, preserve_index=False), path + ".tmp")
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,189 @@
+import logging
+import os
+
+import numpy as np
+
+COMPILED_MODEL_PATH = os.path.join("saved_models", "compiled_forest.npz")
+
+
+class FlatTreeEnsemble:
+    """
+    Tree ensemble flattened into contiguous arrays for low-latency inference. The nodes
+    of every tree are concatenated into one set of int32 feature/child arrays and
+    float32 threshold/leaf value arrays, and a batch is traversed level by level with
+    numpy fancy indexing instead of per-tree, per-row Python calls.
+
+    Leaves point to themselves, which marks them without an extra array, and each step
+    only advances the (row, tree) pairs that have not reached their leaf yet. Thresholds
+    are rounded down to float32, which keeps `x <= threshold` identical to sklearn for
+    the float32 inputs it compares.
+    """
+    # Levels traversed between two removals of the pairs that reached their leaf
+    COMPACT_EVERY = 4
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        # Interleaved (left, right) children so one gather picks the branch taken
+        self._children = np.column_stack([left, right]).ravel()
+        self._is_leaf = left == np.arange(len(left), dtype=left.dtype)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_model(cls, model) -> "FlatTreeEnsemble":
+        """
+        Flattens a fitted sklearn forest regressor (RandomForestRegressor, ExtraTreesRegressor)
+
+        Args:
+            model: fitted forest with single-output `estimators_`
+        Returns:
+            FlatTreeEnsemble: the compiled predictor
+        """
+        if not hasattr(model, "estimators_"):
+            raise ValueError("Model {} is not a fitted tree ensemble".format(type(model).__name__))
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("Only single-output trees can be compiled")
+            nodes = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(round_down_float32(np.where(is_leaf, 0.0, tree.threshold)))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left).astype(np.int32) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right).astype(np.int32) + offset)
+            values.append(tree.value[:, 0, 0].astype(np.float32))
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+        compiled = cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=int(max_depth),
+        )
+        logging.info("Compiled {} trees, {} nodes, {} bytes".format(compiled.n_trees, offset, compiled.nbytes))
+        return compiled
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left, self.right, self.value, self.roots))
+
+    def predict(self, X, batch_size: int = 4096) -> np.ndarray:
+        """
+        Predicts the mean of the trees' leaf values
+
+        Args:
+            X: feature matrix or DataFrame with the training column order
+            batch_size: rows traversed at a time, bounding the (rows x trees) node arrays
+        Returns:
+            np.ndarray: float64 predictions
+        """
+        X = X.to_numpy(dtype=np.float32) if hasattr(X, "to_numpy") else np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        n_features = X.shape[1]
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            flat_batch = batch.ravel()
+            # One entry per (tree, row) pair, tree-major so consecutive gathers stay within
+            # one tree's nodes
+            nodes = np.repeat(self.roots, len(batch))
+            pairs = np.arange(len(nodes))
+            current = nodes
+            offsets = np.tile(np.arange(len(batch), dtype=np.int32) * n_features, self.n_trees)
+            depth = 0
+            while len(pairs) and depth < self.max_depth:
+                go_right = flat_batch[offsets + self.feature[current]] > self.threshold[current]
+                current = self._children[2 * current + go_right]
+                depth += 1
+                # Leaves loop onto themselves, so finished pairs are only dropped every few levels
+                if depth % self.COMPACT_EVERY == 0:
+                    done = self._is_leaf[current]
+                    nodes[pairs[done]] = current[done]
+                    running = ~done
+                    pairs, current, offsets = pairs[running], current[running], offsets[running]
+            nodes[pairs] = current
+            predictions[start:start + len(batch)] = (
+                self.value[nodes].reshape(self.n_trees, len(batch)).mean(axis=0, dtype=np.float64)
+            )
+        return predictions
+
+    def save(self, path: str = COMPILED_MODEL_PATH) -> str:
+        """
+        Saves the arrays to an uncompressed .npz file
+
+        Args:
+            path: file to write the predictor to
+        Returns:
+            str: the path the predictor was written to
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            max_depth=np.int32(self.max_depth),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str = COMPILED_MODEL_PATH) -> "FlatTreeEnsemble":
+        """
+        Loads a predictor saved with `save`
+
+        Args:
+            path: file the predictor was saved to
+        Returns:
+            FlatTreeEnsemble: the compiled predictor
+        """
+        with np.load(path) as arrays:
+            return cls(
+                feature=arrays["feature"],
+                threshold=arrays["threshold"],
+                left=arrays["left"],
+                right=arrays["right"],
+                value=arrays["value"],
+                roots=arrays["roots"],
+                max_depth=int(arrays["max_depth"]),
+            )
+
+
+def round_down_float32(values: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 not above each float64 value, so that `x <= t` keeps its result
+    for every float32 `x`
+    """
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
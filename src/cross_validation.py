@@ -0,0 +1,119 @@
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import KFold, StratifiedKFold
+
+from src.evaluation import RegressionMetrics
+from src.model_dev import MODELS
+
+
+def fit_fold(model_name: str, params: Dict[str, Any], X: np.ndarray, y: np.ndarray,
+             train_idx: np.ndarray, test_idx: np.ndarray) -> RegressionMetrics:
+    """
+    Fits one fold single-threaded and accumulates its test metrics. X and y are
+    memory-mapped, only the rows of the fold are read into the worker.
+    """
+    model = MODELS[model_name]().train(X[train_idx], y[train_idx], n_jobs=1, **params)
+    return RegressionMetrics().update(y[test_idx], model.predict(X[test_idx]))
+
+
+def feature_dtype(X: pd.DataFrame) -> type:
+    """
+    float32 when every column fits in it (compact features), float64 otherwise
+    """
+    for dtype in X.dtypes:
+        dtype = dtype.subtype if isinstance(dtype, pd.SparseDtype) else dtype
+        if not (dtype == np.float32 or pd.api.types.is_bool_dtype(dtype)):
+            return np.float64
+    return np.float32
+
+
+class ParallelKFold:
+    """
+    K-fold cross-validation with the folds fitted in parallel worker processes. The
+    feature matrix and target are written once to .npy files and memory-mapped, so the
+    workers share the page cache instead of each unpickling a copy of the data.
+    """
+    def __init__(
+        self,
+        model_name: str,
+        hyperparameters: Optional[Dict[str, Any]] = None,
+        n_splits: int = 5,
+        stratify_bins: Optional[int] = None,
+        n_jobs: int = -1,
+        random_state: Optional[int] = 42,
+        temp_dir: Optional[str] = None,
+    ):
+        """
+        Args:
+            model_name: model to cross-validate, see MODELS
+            hyperparameters: passed to the model constructor
+            n_splits: number of folds
+            stratify_bins: stratify the folds on this many quantile bins of the target
+            n_jobs: worker processes, -1 uses all cores
+            random_state: seed of the fold shuffling
+            temp_dir: directory of the memory-mapped files, the system default if None
+        """
+        if model_name not in MODELS:
+            raise ValueError("Model {} not supported".format(model_name))
+        if n_splits < 2:
+            raise ValueError("n_splits must be at least 2")
+        self.model_name = model_name
+        self.hyperparameters = hyperparameters or {}
+        self.n_splits = n_splits
+        self.stratify_bins = stratify_bins
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.temp_dir = temp_dir
+        self.fold_scores: List[Dict[str, float]] = []
+        self.pooled_scores: Dict[str, float] = {}
+
+    def folds(self, y: np.ndarray):
+        if self.stratify_bins:
+            bins = pd.qcut(y, self.stratify_bins, labels=False, duplicates="drop")
+            splitter = StratifiedKFold(self.n_splits, shuffle=True, random_state=self.random_state)
+            return list(splitter.split(np.zeros(len(y)), bins))
+        splitter = KFold(self.n_splits, shuffle=True, random_state=self.random_state)
+        return list(splitter.split(np.zeros(len(y))))
+
+    def run(self, X: pd.DataFrame, y: pd.Series) -> Dict[str, float]:
+        """
+        Args:
+            X: features
+            y: target
+        Returns:
+            Dict[str, float]: mean and standard deviation over the folds of every metric
+        """
+        with tempfile.TemporaryDirectory(dir=self.temp_dir, ignore_cleanup_errors=True) as tmp_dir:
+            X_path = os.path.join(tmp_dir, "X.npy")
+            y_path = os.path.join(tmp_dir, "y.npy")
+            np.save(X_path, np.asarray(X.to_numpy(dtype=feature_dtype(X)) if hasattr(X, "to_numpy") else X))
+            np.save(y_path, np.asarray(y, dtype=np.float64))
+            X_shared = np.load(X_path, mmap_mode="r")
+            y_shared = np.load(y_path, mmap_mode="r")
+
+            folds = self.folds(np.asarray(y_shared))
+            fold_metrics = Parallel(n_jobs=self.n_jobs, backend="loky")(
+                delayed(fit_fold)(self.model_name, self.hyperparameters, X_shared, y_shared, train_idx, test_idx)
+                for train_idx, test_idx in folds
+            )
+            del X_shared, y_shared
+
+        self.fold_scores = [metrics.scores() for metrics in fold_metrics]
+        pooled = RegressionMetrics()
+        for metrics in fold_metrics:
+            pooled.merge(metrics)
+        self.pooled_scores = pooled.scores()
+
+        summary = {}
+        for key in self.fold_scores[0]:
+            values = np.array([scores[key] for scores in self.fold_scores])
+            summary["cv_{}_mean".format(key)] = float(values.mean())
+            summary["cv_{}_std".format(key)] = float(values.std(ddof=1))
+        logging.info("Cross-validation over {} folds: {}".format(self.n_splits, summary))
+        return summary
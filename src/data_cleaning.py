@@ -1,6 +1,8 @@
 import logging
+import os
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Dict, List, Optional, Tuple, Union
+import joblib
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
@@ -9,6 +11,459 @@ from sklearn.preprocessing import MinMaxScaler
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+TARGET_COLUMN = "Loan Sanction Amount (USD)"
+DROP_COLUMNS = ["Customer ID", "Name", "Type of Employment", "Property ID"]
+RARE_PROFESSIONS = ["Unemployed", "Businessman", "Student", "Maternity leave"]
+PREPROCESSOR_PATH = os.path.join("saved_models", "preprocessor.joblib")
+
+
+def preprocessor_uri(model_uri: str) -> str:
+    """URI of the preprocessor train_model logged next to the model at `model_uri`."""
+    return model_uri.rstrip("/").rsplit("/", 1)[0] + "/preprocessor/preprocessor.joblib"
+
+
+def is_numeric_column(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class IQROutlierFilter:
+    """
+    Removes rows outside the IQR fences of the numeric columns by building a single
+    boolean mask over one float matrix instead of re-slicing the frame per column.
+
+    "sequential" reproduces the original semantics exactly: the quantiles of each column
+    are computed on the rows kept by the previous columns. "vectorized" computes all
+    bounds in one quantile call on the full data and applies one combined mask.
+    """
+    METHODS = ("sequential", "vectorized")
+
+    def __init__(self, method: str = "sequential", factor: float = 1.5):
+        if method not in self.METHODS:
+            raise ValueError("Outlier method {} not supported".format(method))
+        self.method = method
+        self.factor = factor
+        self.bounds: Dict[str, Tuple[float, float]] = {}
+        self.removed_rows: Dict[str, int] = {}
+
+    def fit_mask(self, df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """
+        Computes the outlier bounds of the columns and the mask of rows to keep
+
+        Args:
+            df: data to filter
+            columns: numeric columns to compute the bounds on
+        Returns:
+            np.ndarray: boolean mask of the rows inside every bound
+        """
+        values = df[columns].to_numpy(dtype=np.float64)
+        keep = np.ones(len(values), dtype=bool)
+        self.bounds = {}
+        self.removed_rows = {}
+        if self.method == "vectorized":
+            q1, q3 = np.quantile(values, [0.25, 0.75], axis=0) if len(values) else (
+                np.full(len(columns), np.nan), np.full(len(columns), np.nan))
+            iqr = q3 - q1
+            lower = q1 - self.factor * iqr
+            upper = q3 + self.factor * iqr
+            inside = (values >= lower) & (values <= upper)
+            for j, col in enumerate(columns):
+                self.bounds[col] = (lower[j], upper[j])
+                # Attribute each removed row to the first column it violates
+                removed = keep & ~inside[:, j]
+                self.removed_rows[col] = int(removed.sum())
+                keep &= ~removed
+        else:
+            for j, col in enumerate(columns):
+                kept_values = values[keep, j]
+                if len(kept_values):
+                    Q1, Q3 = np.quantile(kept_values, [0.25, 0.75])
+                else:
+                    Q1, Q3 = np.nan, np.nan
+                IQR = Q3 - Q1
+                lower = Q1 - self.factor * IQR
+                upper = Q3 + self.factor * IQR
+                self.bounds[col] = (lower, upper)
+                inside = (values[:, j] >= lower) & (values[:, j] <= upper)
+                self.removed_rows[col] = int((keep & ~inside).sum())
+                keep &= inside
+        return keep
+
+
+class DataPreProcessor:
+    """
+    Preprocessor that is fitted once on the training data and stores every statistic
+    (fill values, outlier bounds, skewed columns, dummy categories and scaler) so that
+    new rows can be transformed with the exact training-time features without refitting
+    """
+    def __init__(
+        self,
+        outlier_method: str = "sequential",
+        compact: bool = False,
+        sparse_min_categories: Optional[int] = None,
+    ):
+        """
+        Args:
+            outlier_method: "sequential" or "vectorized", see IQROutlierFilter
+            compact: emit float32 numeric features instead of float64
+            sparse_min_categories: one-hot encode categoricals with at least this many
+                categories as sparse columns (in-memory only, Parquet cannot store them)
+        """
+        self.outlier_method = outlier_method
+        self.compact = compact
+        self.sparse_min_categories = sparse_min_categories
+        self.numeric_columns: List[str] = []
+        self.categorical_columns: List[str] = []
+        self.fill_values: Dict[str, object] = {}
+        self.outlier_bounds: Dict[str, Tuple[float, float]] = {}
+        self.outlier_report: Dict[str, int] = {}
+        self.skewed_columns: List[str] = []
+        self.categories: Dict[str, List[str]] = {}
+        self.scale_columns: List[str] = []
+        self.scaler: Optional[MinMaxScaler] = None
+        self.feature_columns: List[str] = []
+        # Columns kept by feature selection, None keeps every feature column
+        self.selected_features: Optional[List[str]] = None
+        self._skewed_idx: List[int] = []
+        self._selected_idx: Optional[np.ndarray] = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.scaler is not None
+
+    def fit(self, data: pd.DataFrame) -> "DataPreProcessor":
+        """
+        Fits the preprocessor on the training data
+
+        Args:
+            data: raw training data
+        Returns:
+            DataPreProcessor: the fitted preprocessor
+        """
+        self.fit_transform(data)
+        return self
+
+    def fit_transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fits the preprocessor and returns the cleaned training data, i.e. the rows that
+        survive the rare profession, missing value and outlier filters, with the target
+
+        Args:
+            data: raw training data
+        Returns:
+            pd.DataFrame: the preprocessed training data
+        """
+        original_index = data.index
+        raw = self._prepare(data).reset_index(drop=True)
+        self.select_features(None)
+
+        # Drop rare professions
+        df = raw
+        if "Profession" in df.columns:
+            df = df[~df["Profession"].isin(RARE_PROFESSIONS)]
+
+        # Fill missing values
+        self.numeric_columns = [col for col in df.columns if is_numeric_column(df[col])]
+        self.categorical_columns = [col for col in df.columns if col not in self.numeric_columns]
+        self.fill_values = {}
+        for col in df.columns:
+            if col in self.numeric_columns:
+                self.fill_values[col] = df[col].median()
+            else:
+                self.fill_values[col] = df[col].mode()[0]
+        df = df.fillna(self.fill_values)
+
+        # Drop any remaining missing values
+        df = df.dropna()
+
+        # Convert Property Age from days to years
+        if "Property Age" in df.columns:
+            df["Property Age"] = df["Property Age"] / 365
+
+        # Remove outliers using IQR
+        outlier_filter = IQROutlierFilter(method=self.outlier_method)
+        df = df[outlier_filter.fit_mask(df, self.numeric_columns)]
+        self.outlier_bounds = outlier_filter.bounds
+        self.outlier_report = outlier_filter.removed_rows
+        logging.info("Rows removed as outliers per column: {}".format(self.outlier_report))
+
+        # Handle skewness using cube root transformation
+        skewed = df[self.numeric_columns].skew().sort_values(ascending=False)
+        self.skewed_columns = [col for col in skewed[skewed.abs() > 1].index if col != TARGET_COLUMN]
+
+        # Dummy categories and Min-Max Scaling (excluding target)
+        self.categories = {
+            col: sorted(df[col].unique()) for col in self.categorical_columns
+        }
+        self.fit_encoding(df[[col for col in self.numeric_columns if col != TARGET_COLUMN]].to_numpy(dtype=np.float64))
+
+        # Encode the surviving raw rows exactly as new rows are encoded at inference
+        features = self.transform(raw.loc[df.index])
+        if TARGET_COLUMN in df.columns:
+            features.insert(self.numeric_columns.index(TARGET_COLUMN), TARGET_COLUMN, df[TARGET_COLUMN].to_numpy())
+        features.index = original_index[df.index]
+        logging.info("Preprocessor fitted on {} rows, {} features.".format(len(features), len(self.feature_columns)))
+        return features
+
+    def fit_encoding(self, scale_values: np.ndarray) -> None:
+        """
+        Fits the cube root and Min-Max scaling of the numeric features once the fill
+        values, outlier bounds, skewed columns and categories are known
+
+        Args:
+            scale_values: numeric feature values (without target), any rows whose
+                column-wise minimum and maximum match the training data
+        """
+        self.scale_columns = [col for col in self.numeric_columns if col != TARGET_COLUMN]
+        self._skewed_idx = [self.scale_columns.index(col) for col in self.skewed_columns]
+        scale_values = np.array(scale_values, dtype=np.float64)
+        scale_values[:, self._skewed_idx] = np.cbrt(scale_values[:, self._skewed_idx])
+        self.scaler = MinMaxScaler().fit(scale_values)
+        self.feature_columns = self.scale_columns + [
+            f"{col}_{category}" for col, categories in self.categories.items() for category in categories
+        ]
+
+    def select_features(self, columns: Optional[List[str]]) -> None:
+        """
+        Restricts the output of `transform` and `transform_array` to the given columns
+
+        Args:
+            columns: subset of `feature_columns`, None keeps every column
+        """
+        if columns is None:
+            self.selected_features, self._selected_idx = None, None
+            return
+        missing = [col for col in columns if col not in self.feature_columns]
+        if missing:
+            raise ValueError("Unknown feature columns: {}".format(missing))
+        self.selected_features = list(columns)
+        self._selected_idx = np.array([self.feature_columns.index(col) for col in columns], dtype=np.intp)
+
+    @property
+    def input_columns(self) -> List[str]:
+        """Raw columns `transform` reads: the training columns without the target"""
+        return [col for col in self.numeric_columns + self.categorical_columns if col != TARGET_COLUMN]
+
+    @property
+    def output_columns(self) -> List[str]:
+        return self.selected_features if self.selected_features is not None else self.feature_columns
+
+    def inverse_numeric(self, features: pd.DataFrame, column: str) -> np.ndarray:
+        """
+        Recovers the raw values of a numeric column from the encoded features by undoing
+        the Min-Max scaling and the cube root
+
+        Args:
+            features: encoded features containing `column`
+            column: numeric feature column
+        Returns:
+            np.ndarray: the values before encoding
+        """
+        j = self.scale_columns.index(column)
+        values = (np.asarray(features[column], dtype=np.float64) - self.scaler.min_[j]) / self.scaler.scale_[j]
+        if column in self.skewed_columns:
+            values = values ** 3
+        return values
+
+    def inverse_category(self, features: pd.DataFrame, column: str) -> np.ndarray:
+        """
+        Recovers the raw category of a categorical column from its one-hot columns. A row
+        without any active dummy gets the category whose dummy was dropped by feature
+        selection, or "unknown" if that is ambiguous.
+
+        Args:
+            features: encoded features containing the dummies of `column`
+            column: categorical column
+        Returns:
+            np.ndarray: the categories, as objects
+        """
+        categories = self.categories[column]
+        present = [category for category in categories if f"{column}_{category}" in features.columns]
+        if not present:
+            raise ValueError("No one-hot column of {} in the features".format(column))
+        onehot = features[[f"{column}_{category}" for category in present]].to_numpy(dtype=bool)
+        labels = np.asarray(present, dtype=object)[onehot.argmax(axis=1)]
+        missing = [category for category in categories if category not in present]
+        labels[~onehot.any(axis=1)] = missing[0] if len(missing) == 1 else "unknown"
+        return labels
+
+    def training_mask(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Applies the training-time row filters (rare professions, missing values and
+        outlier bounds) with the stored statistics
+
+        Args:
+            data: raw training rows
+        Returns:
+            np.ndarray: boolean mask of the rows kept for training
+        """
+        keep = np.ones(len(data), dtype=bool)
+        if "Profession" in self.categorical_columns:
+            keep &= ~np.asarray(data["Profession"].isin(RARE_PROFESSIONS))
+        numeric = self.numeric_matrix(data, self.numeric_columns)
+        for j, col in enumerate(self.numeric_columns):
+            lower, upper = self.outlier_bounds[col]
+            keep &= (numeric[:, j] >= lower) & (numeric[:, j] <= upper)
+        return keep
+
+    def transform_training(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Filters and transforms training rows with the stored statistics, keeping the target
+
+        Args:
+            data: raw training rows
+        Returns:
+            pd.DataFrame: the preprocessed training rows
+        """
+        rows = data[self.training_mask(data)]
+        features = self.transform(rows)
+        if TARGET_COLUMN in self.numeric_columns:
+            target = self.numeric_matrix(rows, [TARGET_COLUMN])[:, 0]
+            position = min(self.numeric_columns.index(TARGET_COLUMN), features.shape[1])
+            features.insert(position, TARGET_COLUMN, target)
+        return features
+
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transforms new rows with the stored training statistics. No rows are dropped.
+
+        Args:
+            data: raw rows with the same columns as the training data
+        Returns:
+            pd.DataFrame: features aligned to `output_columns`
+        """
+        numeric, dummies = self._encode(data)
+        n_numeric = len(self.scale_columns)
+        if self.compact:
+            numeric = numeric.astype(np.float32)
+        features = pd.DataFrame(numeric, columns=self.feature_columns[:n_numeric], index=data.index)
+        if dummies.shape[1]:
+            dummy_frame = pd.DataFrame(dummies, columns=self.feature_columns[n_numeric:], index=data.index)
+            if self.sparse_min_categories is not None:
+                sparse_columns = [
+                    f"{col}_{category}"
+                    for col, categories in self.categories.items()
+                    if len(categories) >= self.sparse_min_categories
+                    for category in categories
+                ]
+                if sparse_columns:
+                    dummy_frame = dummy_frame.astype({col: pd.SparseDtype(bool, False) for col in sparse_columns})
+            features = pd.concat([features, dummy_frame], axis=1)
+        if self.selected_features is not None:
+            features = features[self.selected_features]
+        return features
+
+    def transform_array(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Transforms new rows into a float64 (float32 if compact) matrix aligned to `output_columns`
+
+        Args:
+            data: raw rows with the same columns as the training data
+        Returns:
+            np.ndarray: the feature matrix
+        """
+        numeric, dummies = self._encode(data)
+        matrix = np.hstack([numeric, dummies]).astype(np.float32 if self.compact else np.float64, copy=False)
+        if self._selected_idx is not None:
+            matrix = matrix[:, self._selected_idx]
+        return matrix
+
+    def _prepare(self, data: pd.DataFrame) -> pd.DataFrame:
+        # Drop irrelevant columns and replace -999 with 0
+        df = data.drop(columns=[col for col in DROP_COLUMNS if col in data.columns])
+        return df.replace(-999, 0)
+
+    def numeric_matrix(self, data, columns: List[str]) -> np.ndarray:
+        """
+        Numeric columns as a float64 matrix with -999 replaced, missing values filled
+        and Property Age converted to years
+
+        Args:
+            data: DataFrame or mapping of column name to values
+            columns: numeric columns to extract
+        Returns:
+            np.ndarray: the values, one column per entry of `columns`
+        """
+        # Column-wise numpy access so that a single row avoids pandas overhead
+        values = np.column_stack([np.asarray(data[col], dtype=np.float64) for col in columns])
+        values[values == -999] = 0
+        missing = np.isnan(values)
+        if missing.any():
+            fill = np.array([self.fill_values[col] for col in columns], dtype=np.float64)
+            values[missing] = np.broadcast_to(fill, values.shape)[missing]
+        if "Property Age" in columns:
+            values[:, columns.index("Property Age")] /= 365
+        return values
+
+    def _encode(self, data) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.is_fitted:
+            raise ValueError("DataPreProcessor must be fitted before calling transform")
+
+        numeric = self.numeric_matrix(data, self.scale_columns)
+        numeric[:, self._skewed_idx] = np.cbrt(numeric[:, self._skewed_idx])
+        numeric *= self.scaler.scale_
+        numeric += self.scaler.min_
+
+        blocks = []
+        for col, categories in self.categories.items():
+            values = np.asarray(data[col], dtype=object)
+            values = np.where(pd.isna(values), self.fill_values[col], values)
+            blocks.append(values[:, None] == np.asarray(categories, dtype=object)[None, :])
+        dummies = np.hstack(blocks) if blocks else np.empty((len(numeric), 0), dtype=bool)
+        return numeric, dummies
+
+    def save(self, path: str = PREPROCESSOR_PATH) -> str:
+        """
+        Saves the fitted preprocessor
+
+        Args:
+            path: file to write the preprocessor to
+        Returns:
+            str: the path the preprocessor was written to
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path: str = PREPROCESSOR_PATH) -> "DataPreProcessor":
+        """
+        Loads a fitted preprocessor
+
+        Args:
+            path: file the preprocessor was saved to
+        Returns:
+            DataPreProcessor: the fitted preprocessor
+        """
+        return joblib.load(path)
+
+
+def feature_memory_report(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Bytes per row of a feature frame as stored, and as it would be stored with the
+    default representation (float64 numerics, dense one byte one-hots)
+
+    Args:
+        df: feature frame
+    Returns:
+        Dict[str, float]: bytes per row before and after, and the reduction ratio
+    """
+    rows = max(len(df), 1)
+    after = df.memory_usage(index=False, deep=True).sum() / rows
+    before = 0.0
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.SparseDtype):
+            dtype = dtype.subtype
+        before += 8 if pd.api.types.is_float_dtype(dtype) else np.dtype(dtype).itemsize
+    return {
+        "bytes_per_row_before": before,
+        "bytes_per_row_after": float(after),
+        "reduction": float(before / after) if after else float("nan"),
+    }
+
+
 class DataStrategy(ABC):
     @abstractmethod
     def handle_data(self, data: pd.DataFrame) -> Union[pd.DataFrame, pd.Series]:
@@ -16,82 +471,134 @@ class DataStrategy(ABC):
 
 
 class DataPreProcessStrategy(DataStrategy):
+    """
+    Fits the given (or a new) DataPreProcessor on the data, or transforms the data
+    with the given preprocessor without refitting it if it is already fitted
+    """
+    def __init__(self, preprocessor: Optional[DataPreProcessor] = None):
+        self.preprocessor = preprocessor
+
     def handle_data(self, data: pd.DataFrame) -> pd.DataFrame:
         try:
-            df = data.copy()
+            if self.preprocessor is None:
+                self.preprocessor = DataPreProcessor()
+            if self.preprocessor.is_fitted:
+                df = self.preprocessor.transform(data)
+            else:
+                df = self.preprocessor.fit_transform(data)
 
-            # Drop irrelevant columns
-            drop_cols = ["Customer ID", "Name", "Type of Employment", "Property ID"]
-            df.drop(columns=[col for col in drop_cols if col in df.columns], inplace=True)
+            logging.info("Data preprocessing complete.")
+            return df
 
-            # Replace -999 with 0
-            df.replace(-999, 0, inplace=True)
+        except Exception as e:
+            logging.error(f"Error in preprocessing data: {e}")
+            raise
 
-            # Drop rare professions
-            if "Profession" in df.columns:
-                rare_professions = ["Unemployed", "Businessman", "Student", "Maternity leave"]
-                df = df[~df["Profession"].isin(rare_professions)]
 
-            # Fill missing values
-            for col in df.columns:
-                if df[col].dtype in ["float64", "int64"]:
-                    df[col] = df[col].fillna(df[col].median())
-                else:
-                    df[col] = df[col].fillna(df[col].mode()[0])
+class DataIndexSplitStrategy(DataStrategy):
+    """
+    Splits the data into train/test row positions instead of copies of the data.
+    Supports stratification on quantile bins of the target, and an ordered holdout
+    where the last `test_size` fraction of rows (by a column or by the index) is the
+    test set.
+    """
+    def __init__(
+        self,
+        test_size: float = 0.2,
+        random_state: int = 42,
+        stratify_bins: Optional[int] = None,
+        order_by: Optional[str] = None,
+    ):
+        """
+        Args:
+            test_size: fraction of rows in the test set
+            random_state: seed of the shuffled split
+            stratify_bins: stratify on this many quantile bins of the target
+            order_by: column of the cleaned data (or "index", the row order of the file)
+                ordering the rows for a holdout split; identifier columns such as
+                "Customer ID" are dropped by the preprocessor, so an ID-ordered
+                holdout needs a file sorted by ID and "index"
+        """
+        self.test_size = test_size
+        self.random_state = random_state
+        self.stratify_bins = stratify_bins
+        self.order_by = order_by
 
-            # Drop any remaining missing values
-            df.dropna(inplace=True)
+    def handle_data(self, data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        try:
+            positions = np.arange(len(data))
+            if self.order_by is not None:
+                if self.order_by != "index" and self.order_by not in data.columns:
+                    raise ValueError("Cannot order the holdout by {!r}, it is not a column of the cleaned "
+                                     "data; use \"index\" for the row order".format(self.order_by))
+                keys = data.index if self.order_by == "index" else data[self.order_by]
+                ordered = np.argsort(np.asarray(keys), kind="stable")
+                n_test = int(np.ceil(len(data) * self.test_size))
+                return ordered[:len(data) - n_test], ordered[len(data) - n_test:]
+            stratify = None
+            if self.stratify_bins:
+                stratify = pd.qcut(data[TARGET_COLUMN], self.stratify_bins, labels=False, duplicates="drop")
+            train_idx, test_idx = train_test_split(
+                positions, test_size=self.test_size, random_state=self.random_state, stratify=stratify
+            )
+            return train_idx, test_idx
+        except Exception as e:
+            logging.error(f"Error in splitting data indices: {e}")
+            raise
 
-            # Convert Property Age from days to years
-            if "Property Age" in df.columns:
-                df["Property Age"] = (df["Property Age"] / 365)
 
-            # Remove outliers using IQR
-            num_cols = df.select_dtypes(include=["float64", "int64"]).columns
-            for col in num_cols:
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower = Q1 - 1.5 * IQR
-                upper = Q3 + 1.5 * IQR
-                df = df[(df[col] >= lower) & (df[col] <= upper)]
-
-            # Update num_cols after outlier removal
-            num_cols = df.select_dtypes(include=["float64", "int64"]).columns
-            
-            # Handle skewness using cube root transformation
-            
-            skewed = df[num_cols].apply(lambda x: x.skew()).sort_values(ascending=False)
-            skewed_cols = skewed[skewed.abs() > 1].index
-            for col in skewed_cols:
-                 if col != "Loan Sanction Amount (USD)":
-                      df[col] = np.cbrt(df[col])
-                      
-            # One-hot encode categorical columns
-            cat_cols = df.select_dtypes(include=["object"]).columns
-            df = pd.get_dummies(df, columns=cat_cols)
-            
-            # Min-Max Scaling (excluding target)
-            scale_cols = df.select_dtypes(include=["float64", "int64"]).columns
-            scale_cols = [col for col in scale_cols if col != "Loan Sanction Amount (USD)"]
-            scaler = MinMaxScaler()
-            df[scale_cols] = scaler.fit_transform(df[scale_cols])
-            
-            logging.info("Data preprocessing complete.")
-            return df
+def split_views(
+    X: Union[np.ndarray, pd.DataFrame],
+    y: Union[np.ndarray, pd.Series],
+    train_idx: np.ndarray,
+    test_idx: np.ndarray,
+    columns: Optional[List[int]] = None,
+) -> Tuple:
+    """
+    Reorders X and y once so that the train rows come first, and returns the train and
+    test sets as views over that single backing copy
 
-        except Exception as e:
-            logging.error(f"Error in preprocessing data: {e}")
-            raise
+    Args:
+        X: feature matrix or frame
+        y: target
+        train_idx: train row positions
+        test_idx: test row positions
+        columns: positions of the columns of X to keep, all if None
+    Returns:
+        X_train, X_test, y_train, y_test views
+    """
+    order = np.concatenate([train_idx, test_idx])
+    n_train = len(train_idx)
+    if isinstance(X, pd.DataFrame):
+        X_ordered = X.iloc[order] if columns is None else X.iloc[order, columns]
+        X_train, X_test = X_ordered.iloc[:n_train], X_ordered.iloc[n_train:]
+    else:
+        X_ordered = X[order] if columns is None else X[np.ix_(order, columns)]
+        X_train, X_test = X_ordered[:n_train], X_ordered[n_train:]
+    if isinstance(y, pd.Series):
+        y_ordered = y.iloc[order]
+        y_train, y_test = y_ordered.iloc[:n_train], y_ordered.iloc[n_train:]
+    else:
+        y_ordered = y[order]
+        y_train, y_test = y_ordered[:n_train], y_ordered[n_train:]
+    return X_train, X_test, y_train, y_test
 
 
 class DataDivideStrategy(DataStrategy):
+    """
+    Splits the data into X_train, X_test, y_train and y_test with `split_views`: the
+    features are copied once, train rows first, and the four sets are views over that
+    copy, so the target-less copy of the whole frame is never built
+    """
+    def __init__(self, index_strategy: Optional[DataIndexSplitStrategy] = None):
+        self.index_strategy = index_strategy or DataIndexSplitStrategy()
+
     def handle_data(self, data: pd.DataFrame) -> Union[pd.DataFrame, pd.Series]:
         try:
-            X = data.drop(["Loan Sanction Amount (USD)"], axis=1)
-            y = data["Loan Sanction Amount (USD)"]
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            return X_train, X_test, y_train, y_test
+            train_idx, test_idx = self.index_strategy.handle_data(data)
+            target = data.columns.get_loc(TARGET_COLUMN)
+            features = [i for i in range(data.shape[1]) if i != target]
+            return split_views(data, data.iloc[:, target], train_idx, test_idx, columns=features)
         except Exception as e:
             logging.error(f"Error in dividing data: {e}")
             raise
@@ -112,4 +619,4 @@ class DataCleaning:
             return self.strategy.handle_data(self.data)
         except Exception as e:
             logging.error("Error in handling data: {}".format(e))
-            raise e
\ No newline at end of file
+            raise e
@@ -0,0 +1,165 @@
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+MISSING_SENTINEL = -999
+
+
+class ColumnSpec:
+    """
+    Declarative description of one column of the loan dataset
+    """
+    def __init__(
+        self,
+        dtype: str,
+        nullable: bool = True,
+        required: bool = True,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+        allowed: Optional[Sequence[str]] = None,
+    ):
+        """
+        Args:
+            dtype: dtype the column is read as ("category" for categoricals)
+            nullable: whether missing values (NaN or -999) are allowed
+            required: whether the column must be present
+            min_value: inclusive lower bound of numeric values
+            max_value: inclusive upper bound of numeric values
+            allowed: allowed values of a categorical column
+        """
+        self.dtype = dtype
+        self.nullable = nullable
+        self.required = required
+        self.min_value = min_value
+        self.max_value = max_value
+        self.allowed = list(allowed) if allowed is not None else None
+
+
+# Columns of the loan dataset that the pipeline uses, in file order.
+# Customer ID, Name, Type of Employment and Property ID are dropped by the
+# preprocessing, so they are never read.
+LOAN_SCHEMA: Dict[str, ColumnSpec] = {
+    "Gender": ColumnSpec("category", allowed=["F", "M"]),
+    "Age": ColumnSpec("int64", nullable=False, min_value=0, max_value=120),
+    "Income (USD)": ColumnSpec("float64", min_value=0),
+    "Income Stability": ColumnSpec("category", allowed=["High", "Low"]),
+    "Profession": ColumnSpec("category", nullable=False, allowed=[
+        "Working", "Commercial associate", "Pensioner", "State servant",
+        "Unemployed", "Businessman", "Student", "Maternity leave",
+    ]),
+    "Location": ColumnSpec("category", nullable=False, allowed=["Rural", "Semi-Urban", "Urban"]),
+    "Loan Amount Request (USD)": ColumnSpec("float64", nullable=False, min_value=0),
+    "Current Loan Expenses (USD)": ColumnSpec("float64", min_value=0),
+    "Expense Type 1": ColumnSpec("category", allowed=["N", "Y"]),
+    "Expense Type 2": ColumnSpec("category", allowed=["N", "Y"]),
+    "Dependents": ColumnSpec("float64", min_value=0, max_value=20),
+    "Credit Score": ColumnSpec("float64", min_value=300, max_value=900),
+    "No. of Defaults": ColumnSpec("int64", min_value=0),
+    "Has Active Credit Card": ColumnSpec("category", allowed=["Active", "Inactive", "Unpossessed"]),
+    "Property Age": ColumnSpec("float64", min_value=0),
+    "Property Type": ColumnSpec("int64", nullable=False, min_value=1, max_value=4),
+    "Property Location": ColumnSpec("category", allowed=["Rural", "Semi-Urban", "Urban"]),
+    "Co-Applicant": ColumnSpec("int64", min_value=0, max_value=1),
+    "Property Price": ColumnSpec("float64", min_value=0),
+    # Absent from the files that are scored
+    "Loan Sanction Amount (USD)": ColumnSpec("float64", required=False, min_value=0),
+}
+
+RAW_DTYPES: Dict[str, str] = {col: spec.dtype for col, spec in LOAN_SCHEMA.items()}
+USE_COLUMNS: List[str] = list(RAW_DTYPES)
+CATEGORICAL_COLUMNS: List[str] = [col for col, dtype in RAW_DTYPES.items() if dtype == "category"]
+NUMERIC_COLUMNS: List[str] = [col for col, dtype in RAW_DTYPES.items() if dtype != "category"]
+
+VIOLATIONS = ["missing_column", "wrong_dtype", "nulls", "out_of_range", "invalid_category"]
+
+
+class SchemaValidationError(ValueError):
+    """
+    Raised when the data violates the schema, carrying the per-column violation report
+    """
+    def __init__(self, report: pd.DataFrame):
+        self.report = report
+        super().__init__("Data violates the schema:\n{}".format(report.to_string()))
+
+
+class CompiledSchema:
+    """
+    Schema compiled into numpy bounds and category lookups, validated with one vectorized
+    operation per column
+    """
+    def __init__(self, schema: Dict[str, ColumnSpec]):
+        self.schema = schema
+        self.numeric = [col for col, spec in schema.items() if spec.dtype != "category"]
+        self.categorical = [col for col, spec in schema.items() if spec.dtype == "category"]
+        self.lower = {
+            col: -np.inf if schema[col].min_value is None else schema[col].min_value for col in self.numeric
+        }
+        self.upper = {
+            col: np.inf if schema[col].max_value is None else schema[col].max_value for col in self.numeric
+        }
+        self.allowed = {
+            col: np.asarray(schema[col].allowed, dtype=object)
+            for col in self.categorical if schema[col].allowed is not None
+        }
+
+    def validate(self, df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Validates the data against the schema
+
+        Args:
+            df: data to validate
+            columns: schema columns to validate, defaults to all of them
+        Returns:
+            pd.DataFrame: violation counts of the violating columns, empty if the data is valid
+        """
+        report = {}
+        for col, spec in self.schema.items():
+            if columns is not None and col not in columns:
+                continue
+            counts = dict.fromkeys(VIOLATIONS, 0)
+            if col not in df.columns:
+                counts["missing_column"] = int(spec.required)
+            elif col in self.numeric:
+                self._validate_numeric(df[col], col, spec, counts)
+            else:
+                self._validate_categorical(df[col], col, spec, counts)
+            if any(counts.values()):
+                report[col] = counts
+        return pd.DataFrame.from_dict(report, orient="index", columns=VIOLATIONS)
+
+    def check(self, df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> None:
+        """
+        Raises SchemaValidationError if the data violates the schema
+        """
+        report = self.validate(df, columns)
+        if len(report):
+            raise SchemaValidationError(report)
+        logging.info("Schema validation passed for {} rows".format(len(df)))
+
+    def _validate_numeric(self, series: pd.Series, col: str, spec: ColumnSpec, counts: dict) -> None:
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            counts["wrong_dtype"] = len(series)
+            return
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(values) | (values == MISSING_SENTINEL)
+        if not spec.nullable:
+            counts["nulls"] = int(missing.sum())
+        counts["out_of_range"] = int((~missing & ((values < self.lower[col]) | (values > self.upper[col]))).sum())
+
+    def _validate_categorical(self, series: pd.Series, col: str, spec: ColumnSpec, counts: dict) -> None:
+        if not spec.nullable:
+            counts["nulls"] = int(series.isna().sum())
+        if col not in self.allowed:
+            return
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Check the few categories once, then look the codes up
+            codes = series.cat.codes.to_numpy()
+            invalid_categories = ~np.isin(np.asarray(series.cat.categories, dtype=object), self.allowed[col])
+            counts["invalid_category"] = int(invalid_categories[codes[codes >= 0]].sum())
+        else:
+            counts["invalid_category"] = int((series.notna() & ~series.isin(self.allowed[col])).sum())
+
+
+LOAN_SCHEMA_VALIDATOR = CompiledSchema(LOAN_SCHEMA)
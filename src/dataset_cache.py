@@ -0,0 +1,138 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import uuid
+from types import ModuleType
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from src.data_cleaning import DataPreProcessor
+
+CACHE_DIR = os.path.join(".cache", "datasets")
+SPLITS = ("x_train", "x_test", "y_train", "y_test")
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of the file content, read in blocks
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version(*modules: ModuleType) -> str:
+    """
+    SHA-256 of the source code of the modules, so a code change invalidates the cache
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(inspect.getsource(module).encode())
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    Content-addressed cache of the cleaned train/test split. Entries are keyed on the raw
+    file's content hash, the preprocessing configuration and the code version, stored as
+    Parquet plus the fitted preprocessor, and evicted least-recently-used first once the
+    cache grows beyond `max_bytes`.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, data_path: str, config: dict, version: str) -> str:
+        """
+        Args:
+            data_path: raw data file
+            config: preprocessing configuration
+            version: code version, see `code_version`
+        Returns:
+            str: the cache key
+        """
+        payload = json.dumps(
+            {"data": file_hash(data_path), "config": config, "code": version}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series, DataPreProcessor]]:
+        """
+        Returns the cached split and preprocessor, or None on a miss
+        """
+        entry = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            X_train, X_test, y_train, y_test = (
+                pd.read_parquet(os.path.join(entry, f"{split}.parquet")) for split in SPLITS
+            )
+            preprocessor = DataPreProcessor.load(os.path.join(entry, "preprocessor.joblib"))
+        except Exception as e:
+            logging.warning("Ignoring unreadable cache entry {}: {}".format(key, e))
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        # Mark the entry as recently used for the LRU eviction
+        os.utime(entry)
+        logging.info("Dataset cache hit {}".format(key))
+        return X_train, X_test, y_train.iloc[:, 0], y_test.iloc[:, 0], preprocessor
+
+    def save(
+        self,
+        key: str,
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame,
+        y_train: pd.Series,
+        y_test: pd.Series,
+        preprocessor: DataPreProcessor,
+    ) -> None:
+        """
+        Stores the split and preprocessor under the key, then evicts old entries
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary directory and rename it so readers never see a partial entry
+        tmp_entry = os.path.join(self.cache_dir, ".tmp-{}".format(uuid.uuid4().hex))
+        os.makedirs(tmp_entry)
+        try:
+            for split, data in zip(SPLITS, (X_train, X_test, y_train.to_frame(), y_test.to_frame())):
+                data.to_parquet(os.path.join(tmp_entry, f"{split}.parquet"))
+            preprocessor.save(os.path.join(tmp_entry, "preprocessor.joblib"))
+            entry = os.path.join(self.cache_dir, key)
+            if os.path.isdir(entry):
+                shutil.rmtree(tmp_entry)
+            else:
+                os.rename(tmp_entry, entry)
+        except Exception:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes least-recently-used entries until the cache fits in `max_bytes`
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files
+            )
+            entries.append((os.path.getmtime(path), size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logging.info("Evicted dataset cache entry {}".format(os.path.basename(path)))
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
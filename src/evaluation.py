@@ -1,6 +1,12 @@
 import logging
+import pickle
+import time
+import tracemalloc
 from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.metrics import mean_squared_error, r2_score
 
 
@@ -62,4 +68,339 @@ class RMSE(Evaluation):
             return rmse
          except Exception as e:
              logging.error("Error in calcualting RMSE: {}".format(e))
-             raise e
\ No newline at end of file
+             raise e
+
+
+class RegressionMetrics(Evaluation):
+    """
+    Evaluation Strategy that computes MSE, RMSE, R2, MAE, MAPE and max error from one pass
+    over the residuals. The accumulator can be updated chunk by chunk and merged with
+    accumulators of other chunks, so test sets never need to be in memory at once.
+    """
+    def __init__(self):
+        self.n = 0
+        # Mean and sum of squared deviations of y_true, merged with Chan's formula
+        self.mean_true = 0.0
+        self.m2_true = 0.0
+        self.sum_squared_error = 0.0
+        self.sum_absolute_error = 0.0
+        self.sum_absolute_percentage_error = 0.0
+        self.max_error = 0.0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> "RegressionMetrics":
+        """
+        Adds a chunk of labels and predictions
+
+        Args:
+            y_true: True labels
+            y_pred: Predicted labels
+        Returns:
+            RegressionMetrics: self
+        """
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+        if len(y_true) == 0:
+            return self
+        chunk = RegressionMetrics()
+        residuals = y_true - y_pred
+        abs_residuals = np.abs(residuals)
+        chunk.n = len(y_true)
+        chunk.mean_true = float(y_true.mean())
+        chunk.m2_true = float(np.square(y_true - chunk.mean_true).sum())
+        chunk.sum_squared_error = float(residuals @ residuals)
+        chunk.sum_absolute_error = float(abs_residuals.sum())
+        # Same epsilon as sklearn's mean_absolute_percentage_error
+        chunk.sum_absolute_percentage_error = float(
+            (abs_residuals / np.maximum(np.abs(y_true), np.finfo(np.float64).eps)).sum()
+        )
+        chunk.max_error = float(abs_residuals.max())
+        return self.merge(chunk)
+
+    def merge(self, other: "RegressionMetrics") -> "RegressionMetrics":
+        """
+        Merges the accumulator of another chunk into this one
+
+        Args:
+            other: accumulator of a disjoint chunk
+        Returns:
+            RegressionMetrics: self
+        """
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean_true - self.mean_true
+        self.m2_true += other.m2_true + delta * delta * self.n * other.n / n
+        self.mean_true += delta * other.n / n
+        self.n = n
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_absolute_error += other.sum_absolute_error
+        self.sum_absolute_percentage_error += other.sum_absolute_percentage_error
+        self.max_error = max(self.max_error, other.max_error)
+        return self
+
+    def scores(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: mse, rmse, r2, mae, mape and max_error of everything added
+        """
+        if self.n == 0:
+            raise ValueError("No predictions were added")
+        mse = self.sum_squared_error / self.n
+        if self.m2_true > 0:
+            r2 = 1.0 - self.sum_squared_error / self.m2_true
+        else:
+            # sklearn's convention for a constant target
+            r2 = 1.0 if self.sum_squared_error == 0 else 0.0
+        return {
+            "mse": mse,
+            "rmse": float(np.sqrt(mse)),
+            "r2": r2,
+            "mae": self.sum_absolute_error / self.n,
+            "mape": self.sum_absolute_percentage_error / self.n,
+            "max_error": self.max_error,
+        }
+
+    def calculate_scores(self, y_true: np.ndarray, y_pred: np.ndarray):
+        try:
+            logging.info("Calculating regression metrics")
+            scores = RegressionMetrics().update(y_true, y_pred).scores()
+            logging.info("Regression metrics: {}".format(scores))
+            return scores
+        except Exception as e:
+            logging.error("Error in calculating regression metrics: {}".format(e))
+            raise e
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Tuple[np.ndarray, np.ndarray]]) -> "RegressionMetrics":
+        """
+        Accumulates (y_true, y_pred) chunks
+
+        Args:
+            chunks: iterable of label and prediction chunks
+        Returns:
+            RegressionMetrics: the accumulator over all chunks
+        """
+        metrics = cls()
+        for y_true, y_pred in chunks:
+            metrics.update(y_true, y_pred)
+        return metrics
+
+
+def _bootstrap_block(y_true: np.ndarray, y_pred: np.ndarray, n_resamples: int, seed) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    R2 and RMSE of `n_resamples` resamples drawn as one (resamples, rows) index matrix
+    """
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(y_true), size=(n_resamples, len(y_true)))
+    true = y_true[idx]
+    residuals = true - y_pred[idx]
+    sse = np.einsum("ij,ij->i", residuals, residuals)
+    true -= true.mean(axis=1, keepdims=True)
+    ss_tot = np.einsum("ij,ij->i", true, true)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(ss_tot > 0, 1.0 - sse / ss_tot, np.where(sse == 0, 1.0, 0.0))
+    return r2, np.sqrt(sse / len(y_true))
+
+
+def bootstrap_intervals(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    random_state: Optional[int] = None,
+    n_jobs: int = 1,
+    max_block_elements: int = 10_000_000,
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Percentile bootstrap confidence intervals of R2 and RMSE. Resamples are drawn in
+    blocks of at most `max_block_elements` indices, each block computed as one
+    vectorized index matrix; with `n_jobs` != 1 the blocks run in a process pool.
+    The intervals only depend on `random_state`, not on `n_jobs`.
+
+    Args:
+        y_true: True labels
+        y_pred: Predicted labels
+        n_resamples: number of bootstrap resamples
+        confidence: coverage of the intervals
+        random_state: seed of the resamples
+        n_jobs: worker processes, -1 uses all cores
+        max_block_elements: bound on the size of one index matrix
+    Returns:
+        Dict[str, Tuple[float, float]]: lower and upper bound of "r2" and "rmse"
+    """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+    if len(y_true) == 0:
+        raise ValueError("No predictions to resample")
+    block = max(1, max_block_elements // len(y_true))
+    sizes = [min(block, n_resamples - start) for start in range(0, n_resamples, block)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    if n_jobs == 1 or len(sizes) == 1:
+        results = [_bootstrap_block(y_true, y_pred, size, seed) for size, seed in zip(sizes, seeds)]
+    else:
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_bootstrap_block)(y_true, y_pred, size, seed) for size, seed in zip(sizes, seeds)
+        )
+    r2 = np.concatenate([result[0] for result in results])
+    rmse = np.concatenate([result[1] for result in results])
+    alpha = (1 - confidence) / 2
+    r2_low, r2_high = np.quantile(r2, [alpha, 1 - alpha])
+    rmse_low, rmse_high = np.quantile(rmse, [alpha, 1 - alpha])
+    return {"r2": (float(r2_low), float(r2_high)), "rmse": (float(rmse_low), float(rmse_high))}
+
+
+SEGMENT_COLUMNS = ["Profession", "Location", "Income Stability"]
+CREDIT_SCORE_BANDS = [-np.inf, 580, 670, 740, 800, np.inf]
+CREDIT_SCORE_LABELS = ["<580", "580-669", "670-739", "740-799", "800+"]
+
+
+def applicant_segments(X: pd.DataFrame, preprocessor) -> Dict[str, np.ndarray]:
+    """
+    Recovers the applicant segments of encoded rows: the raw Profession, Location and
+    Income Stability from their one-hot columns, and credit-score bands from the
+    unscaled Credit Score. Segments whose columns were not kept are skipped.
+
+    Args:
+        X: encoded features
+        preprocessor: the fitted DataPreProcessor that encoded them
+    Returns:
+        Dict[str, np.ndarray]: segment name to the per-row segment value
+    """
+    segments = {}
+    for column in SEGMENT_COLUMNS:
+        if column in preprocessor.categories:
+            try:
+                segments[column] = preprocessor.inverse_category(X, column)
+            except ValueError:
+                logging.warning("Segment {} is not in the features".format(column))
+    if "Credit Score" in X.columns and "Credit Score" in preprocessor.scale_columns:
+        credit_score = preprocessor.inverse_numeric(X, "Credit Score")
+        band = np.digitize(credit_score, CREDIT_SCORE_BANDS[1:-1])
+        segments["Credit Score Band"] = np.asarray(CREDIT_SCORE_LABELS, dtype=object)[band]
+    return segments
+
+
+def sliced_metrics(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    segments: Dict[str, np.ndarray],
+) -> pd.DataFrame:
+    """
+    Count, RMSE, MAE, bias and R2 of every value of every segment. All slices are
+    aggregated together: each segment's values are factorized into slice ids, and one
+    weighted bincount per statistic covers every (segment, value) pair.
+
+    Args:
+        y_true: True labels
+        y_pred: Predicted labels
+        segments: segment name to the per-row segment value
+    Returns:
+        pd.DataFrame: one row per (segment, value)
+    """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+    residuals = y_true - y_pred
+    names: List[str] = []
+    values: List[object] = []
+    codes = []
+    present = []
+    for name, labels in segments.items():
+        segment_codes, uniques = pd.factorize(np.asarray(labels), sort=True)
+        # Rows without a segment value get code -1 and are left out of that segment
+        present.append(segment_codes >= 0)
+        codes.append(segment_codes + len(values))
+        names.extend([name] * len(uniques))
+        values.extend(uniques.tolist())
+    slice_ids = np.concatenate(codes)
+    valid = np.concatenate(present)
+    n_slices = len(values)
+    stacked = len(segments)
+    stats = {}
+    for key, weights in (
+        ("sum_true", np.tile(y_true, stacked)),
+        ("sum_true_sq", np.tile(y_true * y_true, stacked)),
+        ("sum_sq_error", np.tile(residuals * residuals, stacked)),
+        ("sum_abs_error", np.tile(np.abs(residuals), stacked)),
+        ("sum_error", np.tile(residuals, stacked)),
+    ):
+        stats[key] = np.bincount(slice_ids[valid], weights=weights[valid], minlength=n_slices)
+    count = np.bincount(slice_ids[valid], minlength=n_slices).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ss_tot = stats["sum_true_sq"] - stats["sum_true"] ** 2 / count
+        r2 = np.where(ss_tot > 0, 1.0 - stats["sum_sq_error"] / ss_tot, np.nan)
+        table = pd.DataFrame({
+            "segment": names,
+            "value": [str(value) for value in values],
+            "n": count.astype(np.int64),
+            "rmse": np.sqrt(stats["sum_sq_error"] / count),
+            "mae": stats["sum_abs_error"] / count,
+            "bias": -stats["sum_error"] / count,
+            "r2": r2,
+        })
+    return table
+
+
+def serialized_size(model) -> int:
+    """
+    Size in bytes of the pickled model, close to its artifact size on disk
+    """
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def performance_profile(
+    model,
+    X,
+    batch_sizes: Sequence[int] = (1, 100, 1000, 10000),
+    latency_samples: int = 200,
+    repeat: int = 3,
+) -> Dict[str, float]:
+    """
+    Measures the serving cost of a model: p50/p99 single-row latency, predict
+    throughput at each batch size (rows cycled from X when it has fewer rows), the
+    serialized size and the peak memory allocated while predicting the largest batch
+
+    Args:
+        model: fitted model
+        X: rows to predict
+        batch_sizes: batch sizes the throughput is measured at
+        latency_samples: single-row predictions timed
+        repeat: timings per batch size, the best is kept
+    Returns:
+        Dict[str, float]: latency_p50_ms, latency_p99_ms, throughput_rows_per_s_b<size>,
+            throughput_rows_per_s (largest batch), size_bytes and peak_memory_bytes
+    """
+    def rows(positions):
+        return X.iloc[positions] if hasattr(X, "iloc") else X[positions]
+
+    latencies = np.empty(latency_samples)
+    for i in range(latency_samples):
+        row = rows(slice(i % len(X), i % len(X) + 1))
+        start = time.perf_counter()
+        model.predict(row)
+        latencies[i] = time.perf_counter() - start
+    p50, p99 = np.percentile(latencies * 1e3, [50, 99])
+    profile = {"latency_p50_ms": float(p50), "latency_p99_ms": float(p99)}
+
+    for batch_size in batch_sizes:
+        batch = rows(np.arange(batch_size) % len(X))
+        best = np.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            model.predict(batch)
+            best = min(best, time.perf_counter() - start)
+        profile["throughput_rows_per_s_b{}".format(batch_size)] = batch_size / best
+    profile["throughput_rows_per_s"] = profile["throughput_rows_per_s_b{}".format(max(batch_sizes))]
+
+    batch = rows(np.arange(max(batch_sizes)) % len(X))
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    model.predict(batch)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    if not was_tracing:
+        tracemalloc.stop()
+    profile["peak_memory_bytes"] = float(peak)
+    profile["size_bytes"] = float(serialized_size(model))
+    return profile
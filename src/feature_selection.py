@@ -0,0 +1,116 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.inspection import permutation_importance
+
+from src.model_dev import MODELS
+
+
+def complement_columns(X: pd.DataFrame) -> List[str]:
+    """
+    0/1 columns that are the exact complement of an earlier column, such as the second
+    dummy of a two-category feature
+
+    Args:
+        X: feature frame
+    Returns:
+        List[str]: the redundant columns
+    """
+    binary = [col for col in X.columns if X[col].isin([0, 1]).all()]
+    if len(binary) < 2:
+        return []
+    B = X[binary].to_numpy(dtype=np.float64)
+    overlap = B.T @ B
+    counts = np.diag(overlap)
+    # a and b are complements when they are never both 1 and one of them always is
+    complements = (overlap == 0) & (counts[:, None] + counts[None, :] == len(B))
+    redundant = []
+    for j in range(len(binary)):
+        partners = [binary[i] for i in np.flatnonzero(complements[:j, j])]
+        if any(partner not in redundant for partner in partners):
+            redundant.append(binary[j])
+    return redundant
+
+
+class PermutationFeatureSelector:
+    """
+    Drops one column of every complementary one-hot pair, then drops the features whose
+    permutation importance on a held-out slice of the training data is below
+    `threshold`. The permutations of different features run in parallel processes.
+    """
+    def __init__(
+        self,
+        model_name: str = "RandomForest",
+        hyperparameters: Optional[Dict[str, Any]] = None,
+        threshold: float = 0.0,
+        n_repeats: int = 5,
+        validation_fraction: float = 0.2,
+        n_jobs: int = -1,
+        random_state: Optional[int] = 42,
+    ):
+        """
+        Args:
+            model_name: model the importances are computed with, see MODELS
+            hyperparameters: passed to the model constructor
+            threshold: minimum mean R² drop when a feature is permuted
+            n_repeats: permutations per feature
+            validation_fraction: share of the training rows the importances are scored on
+            n_jobs: worker processes, -1 uses all cores
+            random_state: seed of the hold-out split and the permutations
+        """
+        if model_name not in MODELS:
+            raise ValueError("Model {} not supported".format(model_name))
+        self.model_name = model_name
+        self.hyperparameters = hyperparameters or {}
+        self.threshold = threshold
+        self.n_repeats = n_repeats
+        self.validation_fraction = validation_fraction
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.importances: Dict[str, float] = {}
+        self.dropped: Dict[str, str] = {}
+        self.selected_features: List[str] = []
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> List[str]:
+        """
+        Args:
+            X: training features
+            y: training target
+        Returns:
+            List[str]: the selected columns, in their original order
+        """
+        self.dropped = {col: "complement" for col in complement_columns(X)}
+        candidates = [col for col in X.columns if col not in self.dropped]
+
+        rng = np.random.default_rng(self.random_state)
+        order = rng.permutation(len(X))
+        n_val = max(1, int(len(X) * self.validation_fraction))
+        val_idx, fit_idx = order[:n_val], order[n_val:]
+        X_candidates = X[candidates]
+        model = MODELS[self.model_name]().train(
+            X_candidates.iloc[fit_idx], y.iloc[fit_idx], n_jobs=self.n_jobs, **self.hyperparameters
+        )
+        if hasattr(model, "n_jobs"):
+            # The workers below are the parallelism, each scores single-threaded
+            model.set_params(n_jobs=1)
+        result = permutation_importance(
+            model,
+            X_candidates.iloc[val_idx],
+            y.iloc[val_idx],
+            scoring="r2",
+            n_repeats=self.n_repeats,
+            n_jobs=self.n_jobs,
+            random_state=self.random_state,
+        )
+        self.importances = dict(zip(candidates, result.importances_mean.tolist()))
+        for col, importance in self.importances.items():
+            if importance < self.threshold:
+                self.dropped[col] = "importance"
+        self.selected_features = [col for col in X.columns if col not in self.dropped]
+        if not self.selected_features:
+            raise ValueError("No feature reaches the importance threshold {}".format(self.threshold))
+        logging.info("Selected {} of {} features, dropped: {}".format(
+            len(self.selected_features), X.shape[1], self.dropped))
+        return self.selected_features
@@ -0,0 +1,155 @@
+import copy
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import r2_score
+
+from src.evaluation import performance_profile
+
+
+class ModelVariants:
+    """
+    The full model and its compressed variants, with the R² and the performance profile
+    (latency, throughput, size, peak memory) of each, see `performance_profile`.
+    Variants fitted anew on the training data rather than derived from the full model
+    are listed in `refitted`.
+    """
+    FULL = "full"
+
+    def __init__(self):
+        self.models: Dict[str, Any] = {}
+        self.report: Dict[str, Dict[str, float]] = {}
+        self.refitted: Set[str] = set()
+
+    def add(
+        self,
+        name: str,
+        model,
+        X_test,
+        y_test,
+        batch_sizes: Sequence[int] = (1, 100, 1000, 10000),
+        latency_samples: int = 200,
+        refitted: bool = False,
+    ) -> None:
+        """
+        Measures the variant and adds it
+
+        Args:
+            name: variant name
+            model: fitted model
+            X_test: test data
+            y_test: test labels
+            batch_sizes: batch sizes the throughput is measured at
+            latency_samples: single-row predictions timed
+            refitted: the variant was fitted on the training data, not derived from the model
+        """
+        self.models[name] = model
+        if refitted:
+            self.refitted.add(name)
+        self.report[name] = performance_profile(model, X_test, batch_sizes, latency_samples)
+        self.report[name]["r2"] = float(r2_score(y_test, model.predict(X_test)))
+        logging.info("Variant {}: {}".format(name, self.report[name]))
+
+    def smallest_within(
+        self,
+        max_r2_drop: float,
+        max_latency_p99_ms: Optional[float] = None,
+        max_size_bytes: Optional[float] = None,
+        min_throughput_rows_per_s: Optional[float] = None,
+        include_refitted: bool = True,
+    ) -> Optional[str]:
+        """
+        Name of the smallest variant whose R² is at most `max_r2_drop` below the full
+        model's and that meets the given latency, size and throughput budgets, None if
+        no variant does. With `include_refitted=False` the refitted variants are left
+        out, e.g. when the test set only holds the rows of an incremental update.
+        """
+        floor = self.report[self.FULL]["r2"] - max_r2_drop
+        eligible = [
+            name for name, scores in self.report.items()
+            if scores["r2"] >= floor
+            and (include_refitted or name not in self.refitted)
+            and (max_latency_p99_ms is None or scores["latency_p99_ms"] <= max_latency_p99_ms)
+            and (max_size_bytes is None or scores["size_bytes"] <= max_size_bytes)
+            and (min_throughput_rows_per_s is None or scores["throughput_rows_per_s"] >= min_throughput_rows_per_s)
+        ]
+        if not eligible:
+            return None
+        return min(eligible, key=lambda name: self.report[name]["size_bytes"])
+
+
+class ModelCompressor:
+    """
+    Builds smaller variants of a trained model: forests truncated to their first
+    `n_estimators` trees, the model refitted with a capped `max_depth`, and a
+    HistGradientBoosting student distilled from the model's predictions
+    """
+    def __init__(
+        self,
+        prune_estimators: Optional[List[int]] = None,
+        prune_depths: Optional[List[int]] = None,
+        distill: bool = True,
+        distill_params: Optional[Dict[str, Any]] = None,
+        batch_sizes: Sequence[int] = (1, 100, 1000, 10000),
+        latency_samples: int = 200,
+    ):
+        """
+        Args:
+            prune_estimators: tree counts to truncate forests to
+            prune_depths: max_depth values to refit the model with
+            distill: also fit a HistGradientBoosting student
+            distill_params: HistGradientBoostingRegressor parameters of the student
+            batch_sizes: batch sizes the throughput of each variant is measured at
+            latency_samples: single-row predictions timed per variant
+        """
+        self.prune_estimators = prune_estimators or []
+        self.prune_depths = prune_depths or []
+        self.distill = distill
+        self.distill_params = distill_params or {}
+        self.batch_sizes = batch_sizes
+        self.latency_samples = latency_samples
+
+    def compress(self, model, X_train, y_train, X_test, y_test, incremental: bool = False) -> ModelVariants:
+        """
+        Args:
+            model: trained model
+            X_train: training data, used to refit and distill
+            y_train: training labels
+            X_test: test data the variants are scored on
+            y_test: test labels
+            incremental: the model was updated incrementally and X_train only holds the
+                new rows, so only the full model is kept: refits and the student would
+                be fitted on the new rows alone, and truncation keeps the first trees,
+                i.e. drops the trees the update appended
+        Returns:
+            ModelVariants: the full model and every variant
+        """
+        variants = ModelVariants()
+        variants.add(ModelVariants.FULL, model, X_test, y_test, self.batch_sizes, self.latency_samples)
+        if incremental:
+            return variants
+
+        if hasattr(model, "estimators_"):
+            for n_estimators in self.prune_estimators:
+                if n_estimators >= len(model.estimators_):
+                    continue
+                pruned = copy.copy(model)
+                pruned.estimators_ = model.estimators_[:n_estimators]
+                pruned.n_estimators = n_estimators
+                variants.add("trees_{}".format(n_estimators), pruned, X_test, y_test, self.batch_sizes, self.latency_samples)
+
+        if "max_depth" in model.get_params():
+            for max_depth in self.prune_depths:
+                shallow = clone(model).set_params(max_depth=max_depth).fit(X_train, y_train)
+                variants.add("depth_{}".format(max_depth), shallow, X_test, y_test, self.batch_sizes,
+                             self.latency_samples, refitted=True)
+
+        if self.distill:
+            # The student learns the teacher's function rather than the noisy labels
+            student = HistGradientBoostingRegressor(**self.distill_params)
+            student.fit(X_train, model.predict(X_train))
+            variants.add("distilled", student, X_test, y_test, self.batch_sizes, self.latency_samples,
+                         refitted=True)
+        return variants
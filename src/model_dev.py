@@ -1,6 +1,9 @@
 import logging
 from abc import ABC, abstractmethod
-from sklearn.ensemble import RandomForestRegressor
+from typing import Dict, Type
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import SGDRegressor
+from threadpoolctl import threadpool_limits
 
 
 class Model(ABC):
@@ -19,7 +22,36 @@ class Model(ABC):
         """
         pass
 
-class RandomForestModel(Model):
+
+class IncrementalModel(Model):
+    """
+    Model that can be updated with new data starting from a previously trained model,
+    in time proportional to the new data only
+    """
+
+    @abstractmethod
+    def can_update(self, model) -> bool:
+        """
+        Whether `update` can continue training `model`, e.g. False for a deployed
+        variant of another model class such as a distilled student
+        """
+        pass
+
+    @abstractmethod
+    def update(self, model, X_new, y_new):
+        """
+        Updates a trained model with new data
+
+        Args:
+            model: previously trained model
+            X_new: new training data
+            y_new: new training labels
+        Returns:
+            the updated model
+        """
+        pass
+
+class RandomForestModel(IncrementalModel):
     """
     Random Forest model
     """
@@ -40,4 +72,174 @@ class RandomForestModel(Model):
             return reg
         except Exception as e:
             logging.error("Error in Training model: {}".format(e))
-            raise e
\ No newline at end of file
+            raise e
+
+    def can_update(self, model) -> bool:
+        return isinstance(model, RandomForestRegressor)
+
+    def update(self, model, X_new, y_new, n_new_estimators=50, n_jobs=None):
+        """
+        Grows the forest with `n_new_estimators` trees fitted on the new data only,
+        keeping the existing trees
+
+        Args:
+            model: trained RandomForestRegressor
+            X_new: new training data
+            y_new: new training labels
+            n_new_estimators: number of trees to add
+            n_jobs: threads used to fit the new trees
+        Returns:
+            RandomForestRegressor: the grown forest
+        """
+        try:
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + n_new_estimators, n_jobs=n_jobs)
+            model.fit(X_new, y_new)
+            logging.info("Model update completed, {} trees".format(len(model.estimators_)))
+            return model
+        except Exception as e:
+            logging.error("Error in updating model: {}".format(e))
+            raise e
+
+
+class HistGradientBoostingModel(Model):
+    """
+    Histogram-based Gradient Boosting model
+    """
+    def train(self, X_train, y_train, n_jobs=None, **kwargs):
+        """
+        Trains the model
+
+        Args:
+            X_train: Training data
+            y_train: Training labels
+            n_jobs: number of OpenMP threads, None or -1 uses all cores
+        Returns:
+            None
+        """
+        try:
+            reg = HistGradientBoostingRegressor(**kwargs)
+            # HistGradientBoostingRegressor has no n_jobs, its threads come from OpenMP
+            limits = n_jobs if n_jobs is not None and n_jobs > 0 else None
+            with threadpool_limits(limits=limits, user_api="openmp"):
+                reg.fit(X_train, y_train)
+            logging.info("Model Training completed")
+            return reg
+        except Exception as e:
+            logging.error("Error in Training model: {}".format(e))
+            raise e
+
+
+class XGBoostModel(IncrementalModel):
+    """
+    XGBoost model with the histogram tree method
+    """
+    def train(self, X_train, y_train, **kwargs):
+        """
+        Trains the model
+
+        Args:
+            X_train: Training data
+            y_train: Training labels
+        Returns:
+            None
+        """
+        try:
+            from xgboost import XGBRegressor
+
+            kwargs.setdefault("tree_method", "hist")
+            reg = XGBRegressor(**kwargs)
+            reg.fit(X_train, y_train)
+            logging.info("Model Training completed")
+            return reg
+        except Exception as e:
+            logging.error("Error in Training model: {}".format(e))
+            raise e
+
+    def can_update(self, model) -> bool:
+        from xgboost import XGBRegressor
+
+        return isinstance(model, XGBRegressor)
+
+    def update(self, model, X_new, y_new, n_new_estimators=50, n_jobs=None):
+        """
+        Continues boosting from the trained booster with `n_new_estimators` rounds on
+        the new data only
+
+        Args:
+            model: trained XGBRegressor
+            X_new: new training data
+            y_new: new training labels
+            n_new_estimators: number of boosting rounds to add
+            n_jobs: threads used for the new rounds
+        Returns:
+            XGBRegressor: the updated model
+        """
+        try:
+            from xgboost import XGBRegressor
+
+            params = model.get_params()
+            params.update(n_estimators=n_new_estimators, n_jobs=n_jobs)
+            reg = XGBRegressor(**params)
+            reg.fit(X_new, y_new, xgb_model=model.get_booster())
+            logging.info("Model update completed")
+            return reg
+        except Exception as e:
+            logging.error("Error in updating model: {}".format(e))
+            raise e
+
+
+class SGDModel(IncrementalModel):
+    """
+    Linear model trained by stochastic gradient descent, updated with partial_fit
+    """
+    def train(self, X_train, y_train, n_jobs=None, **kwargs):
+        """
+        Trains the model
+
+        Args:
+            X_train: Training data
+            y_train: Training labels
+            n_jobs: unused, SGD is single-threaded
+        Returns:
+            None
+        """
+        try:
+            reg = SGDRegressor(**kwargs)
+            reg.fit(X_train, y_train)
+            logging.info("Model Training completed")
+            return reg
+        except Exception as e:
+            logging.error("Error in Training model: {}".format(e))
+            raise e
+
+    def can_update(self, model) -> bool:
+        return isinstance(model, SGDRegressor)
+
+    def update(self, model, X_new, y_new, n_new_estimators=None, n_jobs=None):
+        """
+        Runs one partial_fit epoch over the new data
+
+        Args:
+            model: trained SGDRegressor
+            X_new: new training data
+            y_new: new training labels
+            n_new_estimators: unused
+            n_jobs: unused
+        Returns:
+            SGDRegressor: the updated model
+        """
+        try:
+            model.partial_fit(X_new, y_new)
+            logging.info("Model update completed")
+            return model
+        except Exception as e:
+            logging.error("Error in updating model: {}".format(e))
+            raise e
+
+
+MODELS: Dict[str, Type[Model]] = {
+    "RandomForest": RandomForestModel,
+    "HistGradientBoosting": HistGradientBoostingModel,
+    "XGBoost": XGBoostModel,
+    "SGD": SGDModel,
+}
\ No newline at end of file
@@ -0,0 +1,227 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.metrics import r2_score
+
+from src.model_dev import MODELS
+
+# Candidate values per hyperparameter, sampled uniformly by the random search
+SEARCH_SPACES: Dict[str, Dict[str, List[Any]]] = {
+    "RandomForest": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [None, 8, 12, 16, 24],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [1.0, 0.7, 0.5, "sqrt"],
+    },
+    "HistGradientBoosting": {
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_iter": [200, 400, 800],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [10, 20, 50],
+        "l2_regularization": [0.0, 0.1, 1.0],
+    },
+    "XGBoost": {
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "n_estimators": [200, 400, 800],
+        "max_depth": [4, 6, 8, 10],
+        "subsample": [0.7, 0.85, 1.0],
+        "colsample_bytree": [0.7, 0.85, 1.0],
+    },
+    "SGD": {
+        "alpha": [1e-5, 1e-4, 1e-3, 1e-2],
+        "penalty": ["l2", "l1", "elasticnet"],
+        "learning_rate": ["invscaling", "adaptive"],
+    },
+}
+
+
+def evaluate_trial(
+    model_name: str,
+    params: Dict[str, Any],
+    X_train,
+    y_train,
+    X_val,
+    y_val,
+) -> Tuple[float, float]:
+    """
+    Fits one candidate single-threaded and scores it on the validation rows
+
+    Returns:
+        Tuple[float, float]: validation R2 and fit time in seconds
+    """
+    start = time.perf_counter()
+    model = MODELS[model_name]().train(X_train, y_train, n_jobs=1, **params)
+    score = r2_score(y_val, model.predict(X_val))
+    return float(score), time.perf_counter() - start
+
+
+class SuccessiveHalvingSearch:
+    """
+    Random search with successive halving. Every rung fits the surviving candidates in
+    parallel worker processes on a growing subsample of the training rows and keeps the
+    best 1/`eta` of them, so most candidates only ever see a fraction of the data.
+
+    The search stops early once `max_trials` fits or `time_budget` seconds are spent, or
+    when a rung's best score does not beat the previous rung's by `min_improvement`.
+    Trials are handed to `log_trials` once per batch rather than one call per metric.
+
+    `base_params` are passed to every trial, with the sampled candidate overriding them;
+    the default search space leaves out the hyperparameters they fix.
+    """
+    def __init__(
+        self,
+        model_name: str,
+        search_space: Optional[Dict[str, List[Any]]] = None,
+        n_candidates: int = 27,
+        eta: int = 3,
+        min_resource: float = 0.1,
+        max_trials: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        min_improvement: Optional[float] = None,
+        validation_fraction: float = 0.2,
+        n_jobs: int = -1,
+        random_state: Optional[int] = 42,
+        log_trials: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        base_params: Optional[Dict[str, Any]] = None,
+    ):
+        if model_name not in MODELS:
+            raise ValueError("Model {} not supported".format(model_name))
+        if eta < 2:
+            raise ValueError("eta must be at least 2")
+        if not 0 < min_resource <= 1:
+            raise ValueError("min_resource must be in (0, 1]")
+        self.model_name = model_name
+        self.base_params = dict(base_params or {})
+        if search_space is None:
+            search_space = {
+                name: values for name, values in SEARCH_SPACES[model_name].items() if name not in self.base_params
+            }
+        self.search_space = search_space
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.min_resource = min_resource
+        self.max_trials = max_trials
+        self.time_budget = time_budget
+        self.min_improvement = min_improvement
+        self.validation_fraction = validation_fraction
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.log_trials = log_trials
+        self.trials: List[Dict[str, Any]] = []
+        self.best_params_: Dict[str, Any] = {}
+        self.best_score_: float = -np.inf
+
+    def sample_candidates(self, rng: np.random.Generator) -> List[Dict[str, Any]]:
+        """
+        Draws up to `n_candidates` distinct configurations from the search space
+        """
+        names = sorted(self.search_space)
+        n_combinations = int(np.prod([len(self.search_space[name]) for name in names]))
+        target = min(self.n_candidates, n_combinations)
+        seen = set()
+        candidates = []
+        while len(candidates) < target:
+            choice = tuple(int(rng.integers(len(self.search_space[name]))) for name in names)
+            if choice in seen:
+                continue
+            seen.add(choice)
+            candidates.append({name: self.search_space[name][i] for name, i in zip(names, choice)})
+        return candidates
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> Dict[str, Any]:
+        """
+        Runs the search on the training data, holding out `validation_fraction` of the
+        rows for scoring
+
+        Args:
+            X: training features
+            y: training target
+        Returns:
+            Dict[str, Any]: the best hyperparameters found
+        """
+        rng = np.random.default_rng(self.random_state)
+        order = rng.permutation(len(X))
+        n_val = max(1, int(len(X) * self.validation_fraction))
+        val_idx, train_idx = order[:n_val], order[n_val:]
+        X_val, y_val = X.iloc[val_idx], y.iloc[val_idx]
+
+        candidates = self.sample_candidates(rng)
+        n_rungs = max(1, int(np.ceil(np.log(len(candidates)) / np.log(self.eta))) + 1)
+        deadline = time.monotonic() + self.time_budget if self.time_budget is not None else None
+        self.trials = []
+        self.best_params_, self.best_score_ = {}, -np.inf
+        previous_best = None
+
+        with Parallel(n_jobs=self.n_jobs, backend="loky") as parallel:
+            for rung in range(n_rungs):
+                fraction = min(1.0, self.min_resource * self.eta ** rung)
+                if rung == n_rungs - 1:
+                    fraction = 1.0
+                rows = train_idx[:max(1, int(len(train_idx) * fraction))]
+                X_rung, y_rung = X.iloc[rows], y.iloc[rows]
+
+                scores = self._run_rung(parallel, candidates, X_rung, y_rung, X_val, y_val, rung, len(rows), deadline)
+                if not scores:
+                    break
+                ranked = sorted(scores, key=lambda item: item[1], reverse=True)
+                rung_best = ranked[0][1]
+                # Candidates fitted on more rows outrank the previous rungs' winners
+                self.best_params_, self.best_score_ = {**self.base_params, **candidates[ranked[0][0]]}, rung_best
+                logging.info("Rung {}: best R2 {:.4f} on {} rows".format(rung, rung_best, len(rows)))
+
+                if (self.min_improvement is not None and previous_best is not None
+                        and rung_best - previous_best < self.min_improvement):
+                    logging.info("Stopping the search: no improvement over the previous rung")
+                    break
+                if self._budget_exhausted(deadline) or len(ranked) == 1:
+                    break
+                previous_best = rung_best
+                keep = max(1, len(ranked) // self.eta)
+                candidates = [candidates[i] for i, _ in ranked[:keep]]
+
+        logging.info("Best hyperparameters: {} (R2 {:.4f})".format(self.best_params_, self.best_score_))
+        return self.best_params_
+
+    def _run_rung(self, parallel, candidates, X_rung, y_rung, X_val, y_val, rung, n_rows, deadline):
+        """
+        Fits the rung's candidates in batches of one trial per worker, checking the
+        budget between batches, and returns (candidate index, score) pairs
+        """
+        batch_size = max(1, effective_n_jobs(self.n_jobs))
+        scores = []
+        for start in range(0, len(candidates), batch_size):
+            if self._budget_exhausted(deadline):
+                break
+            batch = list(range(start, min(start + batch_size, len(candidates))))
+            if self.max_trials is not None:
+                batch = batch[:self.max_trials - len(self.trials)]
+            results = parallel(
+                delayed(evaluate_trial)(
+                    self.model_name, {**self.base_params, **candidates[i]}, X_rung, y_rung, X_val, y_val
+                )
+                for i in batch
+            )
+            batch_trials = []
+            for i, (score, seconds) in zip(batch, results):
+                scores.append((i, score))
+                batch_trials.append({
+                    "trial": len(self.trials) + len(batch_trials),
+                    "rung": rung,
+                    "rows": n_rows,
+                    "params": candidates[i],
+                    "r2": score,
+                    "fit_seconds": seconds,
+                })
+            self.trials.extend(batch_trials)
+            if self.log_trials is not None:
+                self.log_trials(batch_trials)
+        return scores
+
+    def _budget_exhausted(self, deadline: Optional[float]) -> bool:
+        if self.max_trials is not None and len(self.trials) >= self.max_trials:
+            return True
+        return deadline is not None and time.monotonic() >= deadline
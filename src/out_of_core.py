@@ -0,0 +1,304 @@
+import logging
+import os
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import (
+    DROP_COLUMNS,
+    RARE_PROFESSIONS,
+    TARGET_COLUMN,
+    DataPreProcessor,
+    is_numeric_column,
+)
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantile sketch (KLL-style compactors). Each level keeps
+    items of weight 2**level; a full level is sorted and every other item is promoted,
+    so memory stays O(k log(n / k)) whatever the number of values. Below k values
+    the sketch is exact.
+    """
+    def __init__(self, k: int = 4096, seed: Optional[int] = None):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Adds the non-missing values to the sketch
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Merges another sketch into this one
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, qs, extra_value: Optional[float] = None, extra_weight: int = 0) -> np.ndarray:
+        """
+        Linearly interpolated quantiles, optionally as if `extra_weight` more copies of
+        `extra_value` had been added (e.g. missing values filled with the median)
+
+        Args:
+            qs: quantiles in [0, 1]
+            extra_value: value added with weight `extra_weight`
+            extra_weight: number of copies of `extra_value`
+        Returns:
+            np.ndarray: the quantiles
+        """
+        items = [self.levels[level] for level in range(len(self.levels))]
+        weights = [np.full(len(level_items), 2.0 ** level) for level, level_items in enumerate(items)]
+        if extra_value is not None and extra_weight:
+            items.append(np.array([extra_value], dtype=np.float64))
+            weights.append(np.array([float(extra_weight)]))
+        items = np.concatenate(items)
+        weights = np.concatenate(weights)
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if not len(items):
+            return np.full(len(qs), np.nan)
+        order = np.argsort(items, kind="stable")
+        items = items[order]
+        # Last rank (0-based) covered by each item
+        upper_rank = np.cumsum(weights[order]) - 1
+        position = qs * upper_rank[-1]
+        low = np.floor(position)
+        low_item = items[np.searchsorted(upper_rank, low)]
+        high_item = items[np.searchsorted(upper_rank, np.minimum(low + 1, upper_rank[-1]))]
+        return low_item + (high_item - low_item) * (position - low)
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            capacity = max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+            items = self.levels[level]
+            if len(items) > capacity:
+                items = np.sort(items)
+                # Keep an odd leftover at this level, promote every other item of the rest
+                leftover = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(leftover)]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[level] = leftover
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+
+class MomentAccumulator:
+    """
+    Mergeable count, mean, second and third central moments (Chan et al. parallel
+    update), from which the bias-adjusted sample skewness of pandas is computed
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        other = MomentAccumulator()
+        other.n = len(values)
+        other.mean = values.mean()
+        deviation = values - other.mean
+        other.m2 = np.dot(deviation, deviation)
+        other.m3 = np.dot(deviation * deviation, deviation)
+        other.min = values.min()
+        other.max = values.max()
+        self.merge(other)
+
+    def merge(self, other: "MomentAccumulator") -> "MomentAccumulator":
+        if not other.n:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        m2 = self.m2 + other.m2 + delta ** 2 * self.n * other.n / n
+        m3 = (
+            self.m3 + other.m3
+            + delta ** 3 * self.n * other.n * (self.n - other.n) / n ** 2
+            + 3 * delta * (self.n * other.m2 - other.n * self.m2) / n
+        )
+        self.mean += delta * other.n / n
+        self.n, self.m2, self.m3 = n, m2, m3
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def skew(self) -> float:
+        n = self.n
+        if n < 3 or self.m2 <= 0:
+            return 0.0
+        g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return g1 * np.sqrt(n * (n - 1)) / (n - 2)
+
+
+class OutOfCoreDataPreProcessor:
+    """
+    Fits a DataPreProcessor over data streamed in chunks and writes the transformed
+    chunks to Parquet, so peak memory is bounded by the chunk size, not the file size.
+
+    Pass one collects mergeable statistics: quantile sketches and missing counts for the
+    medians and IQR bounds, category counters for the modes, then (on rows inside the
+    bounds) moments for the skewness, min/max for the scaler and the dummy categories.
+    Because the moments depend on the IQR bounds, pass one scans the chunks twice.
+    Pass two filters, transforms and writes each chunk.
+
+    The IQR bounds are computed jointly over all rows, i.e. the "vectorized" outlier
+    method of DataPreProcessor, and medians and quartiles are approximate above `k` rows.
+    """
+    def __init__(
+        self,
+        chunks: Callable[[], Iterable[pd.DataFrame]],
+        sketch_size: int = 4096,
+        seed: int = 0,
+        compact: bool = False,
+    ):
+        """
+        Args:
+            chunks: callable returning a fresh iterator over the raw data chunks
+            sketch_size: compactor size of the quantile sketches
+            seed: seed of the sketches' compactions, so the same chunks always give the
+                same quartiles and outlier bounds
+            compact: emit float32 numeric features, see DataPreProcessor
+        """
+        self.chunks = chunks
+        self.sketch_size = sketch_size
+        self.seed = seed
+        self.preprocessor = DataPreProcessor(outlier_method="vectorized", compact=compact)
+
+    def fit(self) -> DataPreProcessor:
+        """
+        Runs pass one and returns the fitted preprocessor
+        """
+        preprocessor = self.preprocessor
+        sketches: Dict[str, QuantileSketch] = {}
+        missing: Counter = Counter()
+        counters: Dict[str, Counter] = {}
+
+        # Medians, modes and quartiles
+        for chunk in self._prepared_chunks():
+            if not sketches:
+                preprocessor.numeric_columns = [col for col in chunk.columns if is_numeric_column(chunk[col])]
+                preprocessor.categorical_columns = [
+                    col for col in chunk.columns if col not in preprocessor.numeric_columns
+                ]
+                sketches = {col: QuantileSketch(self.sketch_size, seed=self.seed) for col in preprocessor.numeric_columns}
+                counters = {col: Counter() for col in preprocessor.categorical_columns}
+            for col, sketch in sketches.items():
+                values = chunk[col].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+                values[values == -999] = 0
+                if col == "Property Age":
+                    values = values / 365
+                sketch.update(values)
+                missing[col] += int(np.isnan(values).sum())
+            for col, counter in counters.items():
+                counter.update(chunk[col].dropna().value_counts().to_dict())
+
+        preprocessor.fill_values = {}
+        for col, sketch in sketches.items():
+            median = sketch.quantile(0.5)[0]
+            # Property Age is sketched in years but filled in days, like the in-memory path
+            preprocessor.fill_values[col] = median * 365 if col == "Property Age" else median
+        for col, counter in counters.items():
+            counts = {value: count for value, count in counter.items() if count}
+            top = max(counts.values())
+            preprocessor.fill_values[col] = sorted(value for value, count in counts.items() if count == top)[0]
+
+        preprocessor.outlier_bounds = {}
+        for col, sketch in sketches.items():
+            median = sketch.quantile(0.5)[0]
+            Q1, Q3 = sketch.quantile([0.25, 0.75], extra_value=median, extra_weight=missing[col])
+            IQR = Q3 - Q1
+            preprocessor.outlier_bounds[col] = (Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
+
+        # Skewness, scaler range and dummy categories of the rows inside the bounds
+        moments = {col: MomentAccumulator() for col in preprocessor.numeric_columns}
+        categories: Dict[str, set] = {col: set() for col in preprocessor.categorical_columns}
+        removed: Counter = Counter()
+        for chunk in self._prepared_chunks():
+            numeric = preprocessor.numeric_matrix(chunk, preprocessor.numeric_columns)
+            keep = np.ones(len(chunk), dtype=bool)
+            for j, col in enumerate(preprocessor.numeric_columns):
+                lower, upper = preprocessor.outlier_bounds[col]
+                inside = (numeric[:, j] >= lower) & (numeric[:, j] <= upper)
+                removed[col] += int((keep & ~inside).sum())
+                keep &= inside
+            for j, col in enumerate(preprocessor.numeric_columns):
+                moments[col].update(numeric[keep, j])
+            for col in preprocessor.categorical_columns:
+                values = chunk[col].to_numpy(dtype=object)[keep]
+                values = np.where(pd.isna(values), preprocessor.fill_values[col], values)
+                categories[col].update(pd.unique(values))
+        preprocessor.outlier_report = {col: removed[col] for col in preprocessor.numeric_columns}
+
+        preprocessor.skewed_columns = [
+            col for col, accumulator in moments.items() if abs(accumulator.skew()) > 1 and col != TARGET_COLUMN
+        ]
+        preprocessor.categories = {col: sorted(values) for col, values in categories.items()}
+        scale_columns = [col for col in preprocessor.numeric_columns if col != TARGET_COLUMN]
+        preprocessor.fit_encoding(np.array([
+            [moments[col].min for col in scale_columns],
+            [moments[col].max for col in scale_columns],
+        ]))
+        logging.info("Out-of-core preprocessor fitted, outlier rows removed per column: {}".format(
+            preprocessor.outlier_report))
+        return preprocessor
+
+    def fit_transform(self, output_path: str) -> DataPreProcessor:
+        """
+        Runs both passes and writes the preprocessed training rows to `output_path`
+
+        Args:
+            output_path: Parquet file to write the preprocessed data to
+        Returns:
+            DataPreProcessor: the fitted preprocessor
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        preprocessor = self.fit()
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        writer = None
+        rows = 0
+        try:
+            for chunk in self._prepared_chunks():
+                features = preprocessor.transform_training(chunk)
+                table = pa.Table.from_pandas(features, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                rows += len(features)
+        finally:
+            if writer is not None:
+                writer.close()
+        logging.info("Wrote {} preprocessed rows to {}".format(rows, output_path))
+        return preprocessor
+
+    def _prepared_chunks(self) -> Iterable[pd.DataFrame]:
+        for chunk in self.chunks():
+            chunk = chunk.drop(columns=[col for col in DROP_COLUMNS if col in chunk.columns])
+            if "Profession" in chunk.columns:
+                chunk = chunk[~chunk["Profession"].isin(RARE_PROFESSIONS)]
+            yield chunk
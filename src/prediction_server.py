@@ -0,0 +1,744 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import queue
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import DataPreProcessor, preprocessor_uri
+from src.data_schema import LOAN_SCHEMA_VALIDATOR, SchemaValidationError
+
+DEFAULT_PORT = 5005
+NPY_CONTENT_TYPE = "application/x-npy"
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_CONTENT_TYPE = "application/vnd.apache.arrow.file"
+
+
+def resolve_model_path(model_uri: str) -> str:
+    """
+    Local directory of an MLflow model. runs:/, models:/ and remote URIs are downloaded
+    once through MLflow; local paths and file:// URIs are used as they are, without
+    importing MLflow.
+    """
+    if model_uri.startswith("file://"):
+        model_uri = model_uri[len("file://"):]
+    if os.path.exists(model_uri):
+        return model_uri
+    import mlflow
+
+    return mlflow.artifacts.download_artifacts(artifact_uri=model_uri)
+
+
+def load_model(model_uri: str):
+    """
+    Loads the pickled model of an MLflow sklearn model directory (or a pickle file)
+
+    Args:
+        model_uri: MLflow model URI, model directory or pickle file
+    Returns:
+        the fitted model
+    """
+    path = resolve_model_path(model_uri)
+    if os.path.isdir(path):
+        pickled_model = "model.pkl"
+        mlmodel = os.path.join(path, "MLmodel")
+        if os.path.exists(mlmodel):
+            import yaml
+
+            with open(mlmodel) as f:
+                flavors = yaml.safe_load(f).get("flavors", {})
+            pickled_model = flavors.get("sklearn", {}).get("pickled_model", pickled_model)
+        path = os.path.join(path, pickled_model)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_preprocessor(model_uri: str, path: Optional[str] = None) -> Optional[DataPreProcessor]:
+    """
+    Loads the preprocessor train_model logged next to the model
+
+    Args:
+        model_uri: MLflow model URI or model directory
+        path: preprocessor URI or file, overriding the one next to the model
+    Returns:
+        DataPreProcessor: the fitted preprocessor, None if the model has none
+    """
+    if path is not None:
+        return DataPreProcessor.load(resolve_model_path(path))
+    try:
+        path = resolve_model_path(preprocessor_uri(model_uri))
+    except Exception as e:
+        logging.warning("No preprocessor found next to {}: {}".format(model_uri, e))
+        return None
+    if not os.path.isfile(path):
+        logging.warning("No preprocessor found next to {}".format(model_uri))
+        return None
+    return DataPreProcessor.load(path)
+
+
+def model_input_dtype(model: Any) -> type:
+    """float32 for tree ensembles, which cast their input to it anyway, float64 otherwise"""
+    if hasattr(model, "estimators_") or hasattr(model, "get_booster"):
+        return np.float32
+    return np.float64
+
+
+def read_npy(body: bytes) -> np.ndarray:
+    """Views the array of an .npy body without copying it"""
+    stream = io.BytesIO(body)
+    version = np.lib.format.read_magic(stream)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    if dtype.hasobject:
+        raise ValueError(".npy requests must hold a numeric array")
+    array = np.frombuffer(body, dtype=dtype, count=int(np.prod(shape)), offset=stream.tell())
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def read_arrow(body: bytes, file_format: bool = False):
+    """Reads an Arrow IPC stream (or file) body as a table referencing the body's buffers"""
+    import pyarrow as pa
+
+    buffer = pa.py_buffer(body)
+    reader = pa.ipc.open_file(buffer) if file_format else pa.ipc.open_stream(buffer)
+    return reader.read_all()
+
+
+def parse_request(body: bytes, content_type: str) -> Union[pd.DataFrame, np.ndarray, Any]:
+    """
+    Parses an MLflow scoring request: CSV, JSON with "dataframe_split",
+    "dataframe_records", "instances" or "inputs", a NumPy .npy array or an Arrow IPC
+    stream or file. Binary bodies are returned as an array or Arrow table without copying.
+    """
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type == NPY_CONTENT_TYPE:
+        return read_npy(body)
+    if content_type in (ARROW_STREAM_CONTENT_TYPE, ARROW_FILE_CONTENT_TYPE):
+        return read_arrow(body, file_format=content_type == ARROW_FILE_CONTENT_TYPE)
+    if content_type == "text/csv":
+        return pd.read_csv(io.BytesIO(body))
+    if content_type != "application/json":
+        raise ValueError("Unsupported content type {}".format(content_type))
+    payload = json.loads(body)
+    if "dataframe_split" in payload:
+        split = payload["dataframe_split"]
+        return pd.DataFrame(split["data"], columns=split.get("columns"), index=split.get("index"))
+    if "dataframe_records" in payload:
+        return pd.DataFrame(payload["dataframe_records"])
+    for key in ("instances", "inputs"):
+        if key in payload:
+            data = payload[key]
+            if isinstance(data, dict):
+                return pd.DataFrame(data)
+            if data and isinstance(data[0], dict):
+                return pd.DataFrame(data)
+            return pd.DataFrame(np.asarray(data, dtype=np.float64).reshape(len(data), -1))
+    raise ValueError("Request must contain dataframe_split, dataframe_records, instances or inputs")
+
+
+def encode_response(predictions: np.ndarray, accept: str = "") -> Tuple[bytes, str]:
+    """
+    Encodes the predictions in the format the client accepts: an .npy array, an Arrow
+    IPC stream with a "predictions" column, or {"predictions": [...]} JSON by default
+
+    Returns:
+        Tuple[bytes, str]: the body and its content type
+    """
+    if NPY_CONTENT_TYPE in accept:
+        buffer = io.BytesIO()
+        np.save(buffer, predictions, allow_pickle=False)
+        return buffer.getvalue(), NPY_CONTENT_TYPE
+    if ARROW_STREAM_CONTENT_TYPE in accept:
+        import pyarrow as pa
+
+        table = pa.table({"predictions": predictions})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_STREAM_CONTENT_TYPE
+    return json.dumps({"predictions": predictions.tolist()}).encode(), "application/json"
+
+
+class PredictionCache:
+    """
+    Size-bounded LRU cache of single-row predictions with a time to live. Rows are keyed
+    by a hash of their canonical feature vector keyed with the model version, so a
+    prediction is only ever reused for the exact features and model it was computed with.
+    """
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 300.0, max_request_rows: int = 100):
+        """
+        Args:
+            max_entries: rows kept, the least recently used are evicted beyond it
+            ttl_seconds: seconds a prediction is reused for
+            max_request_rows: larger requests bypass the cache, so bulk scoring neither
+                pays for the hashing nor evicts the interactive entries
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_request_rows = max_request_rows
+        self._entries: "OrderedDict[bytes, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def hash_rows(rows, model_version: str) -> List[bytes]:
+        """Hash of every canonical row (bytes), scoped to the model version."""
+        scope = model_version.encode()[:64]
+        return [hashlib.blake2b(row, digest_size=16, key=scope).digest() for row in rows]
+
+    @staticmethod
+    def numeric_keys(X: np.ndarray, model_version: str) -> List[bytes]:
+        """Keys of the rows of a numeric feature matrix, as float64 with -0.0 and NaN normalized."""
+        X = np.array(X, dtype=np.float64, order="C")
+        X += 0.0  # -0.0 becomes 0.0
+        X[np.isnan(X)] = np.nan  # one NaN bit pattern
+        return PredictionCache.hash_rows((row.tobytes() for row in X), model_version)
+
+    @staticmethod
+    def mixed_keys(values: np.ndarray, numeric: List[bool], model_version: str) -> List[bytes]:
+        """
+        Keys of the rows of an object matrix of numbers and categories: numbers as floats,
+        categories as strings and missing values as None, so 1825 and 1825.0 match
+        """
+        rows = []
+        for row in values:
+            canonical = tuple(
+                None if value is None or value != value
+                else float(value) + 0.0 if is_numeric
+                else str(value)
+                for value, is_numeric in zip(row, numeric)
+            )
+            rows.append(repr(canonical).encode())
+        return PredictionCache.hash_rows(rows, model_version)
+
+    def get(self, keys: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: the cached predictions (NaN for misses) and
+                the mask of the rows found
+        """
+        values = np.full(len(keys), np.nan)
+        found = np.zeros(len(keys), dtype=bool)
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] < now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    continue
+                self._entries.move_to_end(key)
+                values[i] = entry[1]
+                found[i] = True
+            self.hits += int(found.sum())
+            self.misses += len(keys) - int(found.sum())
+        return values, found
+
+    def put(self, keys: List[bytes], values: np.ndarray) -> None:
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in zip(keys, values.tolist()):
+                self._entries[key] = (expires, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class PredictionService:
+    """
+    Holds the model loaded once at startup and scores requests with it. Columns are
+    reordered to the model's training columns when the model records them.
+
+    With the training preprocessor, requests can also carry the raw applicant fields
+    (`raw=True`): they are encoded on the server with the training-time statistics, one
+    vectorized transform per batch.
+
+    With a PredictionCache, the predictions of small requests are cached per row and the
+    cache is invalidated whenever the model is swapped.
+    """
+    def __init__(
+        self,
+        model: Any,
+        preprocessor: Optional[DataPreProcessor] = None,
+        cache: Optional[PredictionCache] = None,
+    ):
+        self.cache = cache
+        self.swap(model, preprocessor)
+        self.ready = True
+
+    @classmethod
+    def from_uri(
+        cls, model_uri: str, preprocessor_path: Optional[str] = None, cache: Optional[PredictionCache] = None
+    ) -> "PredictionService":
+        return cls(load_model(model_uri), load_preprocessor(model_uri, preprocessor_path), cache)
+
+    def swap(self, model: Any, preprocessor: Optional[DataPreProcessor] = None) -> None:
+        """
+        Replaces the model (and preprocessor) served, under a new model version
+        """
+        feature_names = list(getattr(model, "feature_names_in_", [])) or None
+        if preprocessor is not None and feature_names is not None:
+            unknown = [col for col in feature_names if col not in preprocessor.output_columns]
+            if unknown:
+                logging.warning("The preprocessor does not produce the model features {}, "
+                                "raw requests are disabled".format(unknown))
+                preprocessor = None
+        self.model = model
+        self.feature_names = feature_names
+        self.preprocessor = preprocessor
+        self.input_dtype = model_input_dtype(model)
+        # Set after the model: a request that sees the new version also sees the new model
+        self.model_version = uuid.uuid4().hex
+        if self.cache is not None:
+            self.cache.clear()
+
+    def reload(self, model_uri: str, preprocessor_path: Optional[str] = None) -> None:
+        """Loads and swaps in the model at `model_uri`."""
+        self.swap(load_model(model_uri), load_preprocessor(model_uri, preprocessor_path))
+
+    def prepare(self, df: Union[pd.DataFrame, np.ndarray, Any], raw: bool = False) -> pd.DataFrame:
+        """Validates the request columns and puts them in training order."""
+        if isinstance(df, np.ndarray):
+            if raw:
+                raise ValueError(".npy requests carry the encoded features, send them to /invocations")
+            return self.matrix_frame(df)
+        if not isinstance(df, pd.DataFrame):
+            # Arrow table
+            if raw:
+                return self.prepare(df.to_pandas(), raw)
+            return self.table_frame(df)
+        if raw:
+            if self.preprocessor is None:
+                raise ValueError("The model is served without its preprocessor, send encoded features to /invocations")
+            columns = self.preprocessor.input_columns
+        else:
+            columns = self.feature_names
+        if columns is not None:
+            missing = [col for col in columns if col not in df.columns]
+            if missing:
+                raise ValueError("Missing columns: {}".format(missing))
+            df = df[columns]
+        if raw:
+            # JSON gives an all-null column (e.g. one row with a null income) object dtype
+            null_columns = [
+                col for col in LOAN_SCHEMA_VALIDATOR.numeric
+                if col in df.columns and df[col].dtype == object and df[col].isna().all()
+            ]
+            if null_columns:
+                df = df.astype(dict.fromkeys(null_columns, np.float64))
+            # Unknown categories and out-of-range values would be silently encoded
+            report = LOAN_SCHEMA_VALIDATOR.validate(df, columns)
+            if len(report):
+                raise SchemaValidationError(report)
+        return df
+
+    def matrix_frame(self, X: np.ndarray) -> pd.DataFrame:
+        """Wraps a feature matrix whose columns are in training order, without copying it."""
+        if X.ndim != 2:
+            raise ValueError("Expected a 2-D feature matrix, got shape {}".format(X.shape))
+        if self.feature_names is not None and X.shape[1] != len(self.feature_names):
+            raise ValueError("Expected {} columns, got {}".format(len(self.feature_names), X.shape[1]))
+        return pd.DataFrame(X, columns=self.feature_names, copy=False)
+
+    def table_frame(self, table) -> pd.DataFrame:
+        """Copies the columns of an Arrow table straight into the model's input matrix."""
+        columns = self.feature_names or table.column_names
+        missing = [col for col in columns if col not in table.column_names]
+        if missing:
+            raise ValueError("Missing columns: {}".format(missing))
+        X = np.empty((table.num_rows, len(columns)), dtype=self.input_dtype)
+        for j, col in enumerate(columns):
+            start = 0
+            for chunk in table.column(col).chunks:
+                X[start:start + len(chunk), j] = chunk.to_numpy(zero_copy_only=False)
+                start += len(chunk)
+        return pd.DataFrame(X, columns=columns, copy=False)
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Encodes raw applicant rows into the model features."""
+        features = pd.DataFrame(self.preprocessor.transform_array(df), columns=self.preprocessor.output_columns)
+        return features if self.feature_names is None else features[self.feature_names]
+
+    def predict_prepared(self, df: pd.DataFrame, raw: bool = False) -> np.ndarray:
+        if raw:
+            df = self.encode(df)
+        return np.asarray(self.model.predict(df))
+
+    def cache_keys(self, df: Union[pd.DataFrame, np.ndarray, Any], raw: bool = False) -> Optional[List[bytes]]:
+        """
+        Cache keys of the request rows, computed from the request itself so that a hit
+        needs neither column reordering nor encoding. None if the request is not cached:
+        no cache, too many rows, an Arrow table or columns missing (prepare reports them).
+        """
+        if self.cache is None or len(df) > self.cache.max_request_rows:
+            return None
+        # Version read before the model is used, see swap
+        version = self.model_version
+        if isinstance(df, np.ndarray):
+            if raw or self.feature_names is None or df.ndim != 2 or df.shape[1] != len(self.feature_names):
+                return None
+            return PredictionCache.numeric_keys(df, version)
+        if not isinstance(df, pd.DataFrame):
+            return None
+        if raw:
+            if self.preprocessor is None:
+                return None
+            columns = self.preprocessor.input_columns
+        else:
+            columns = self.feature_names
+        if columns is None:
+            return None
+        # Plain dict lookups, get_indexer costs more than the whole cache hit
+        positions = dict(zip(df.columns.tolist(), range(df.shape[1])))
+        idx = [positions.get(col, -1) for col in columns]
+        if min(idx) < 0:
+            return None
+        try:
+            if not raw:
+                return PredictionCache.numeric_keys(df.to_numpy(dtype=np.float64)[:, idx], version)
+            numeric = [col in self.preprocessor.numeric_columns for col in columns]
+            return PredictionCache.mixed_keys(df.to_numpy(dtype=object)[:, idx], numeric, "raw:" + version)
+        except (TypeError, ValueError):
+            # Malformed values are reported by prepare and the model
+            return None
+
+    def predict_cached(
+        self, df: Union[pd.DataFrame, np.ndarray, Any], raw: bool, predict: Callable[[pd.DataFrame], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Answers the cached rows of the request from the cache and the others with
+        `predict`, called on the prepared rows that were not cached
+        """
+        keys = self.cache_keys(df, raw)
+        if keys is None:
+            return predict(self.prepare(df, raw))
+        values, found = self.cache.get(keys)
+        if not found.all():
+            missing = np.flatnonzero(~found)
+            prepared = self.prepare(df, raw)
+            if len(missing) < len(keys):
+                prepared = prepared.iloc[missing]
+            values[missing] = predict(prepared)
+            self.cache.put([keys[i] for i in missing], values[missing])
+        return values
+
+    def predict(self, df: Union[pd.DataFrame, np.ndarray, Any], raw: bool = False) -> np.ndarray:
+        return self.predict_cached(df, raw, lambda prepared: self.predict_prepared(prepared, raw))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"cache": self.cache.metrics()} if self.cache is not None else {}
+
+    def close(self) -> None:
+        pass
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent requests into one batched predict. A worker thread takes the
+    first queued request, then keeps collecting until `max_batch_rows` rows are queued or
+    `max_wait_ms` has passed, predicts them together and hands each caller its rows.
+    With `max_wait_ms=0` it never waits and only batches requests that are already queued.
+
+    Requests are validated in the caller's thread, so a bad request fails on its own. If
+    a batch fails anyway, its requests are retried one by one. Raw and encoded requests
+    of a batch are predicted as two groups. Cached rows are answered in the caller's
+    thread, only the others wait for a batch.
+    """
+    def __init__(self, service: PredictionService, max_batch_rows: int = 64, max_wait_ms: float = 2.0):
+        if max_batch_rows < 1:
+            raise ValueError("max_batch_rows must be at least 1")
+        self.service = service
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1e3
+        self._queue: "queue.Queue[Optional[Tuple[pd.DataFrame, bool, Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._requests = 0
+        self._max_rows = 0
+        # Batch sizes bucketed by the next power of two
+        self._histogram: Counter = Counter()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    @property
+    def ready(self) -> bool:
+        return self.service.ready and self._worker.is_alive()
+
+    def predict(self, df: Union[pd.DataFrame, np.ndarray, Any], raw: bool = False) -> np.ndarray:
+        return self.service.predict_cached(df, raw, lambda prepared: self._submit(prepared, raw))
+
+    def _submit(self, prepared: pd.DataFrame, raw: bool) -> np.ndarray:
+        future: Future = Future()
+        self._queue.put((prepared, raw, future))
+        return future.result()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: batches and rows predicted, mean and max rows per batch,
+                requests per batch, the histogram of batch sizes and the cache counters
+        """
+        with self._lock:
+            return {
+                **self.service.metrics(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "mean_batch_rows": self._rows / self._batches if self._batches else 0.0,
+                "mean_batch_requests": self._requests / self._batches if self._batches else 0.0,
+                "max_batch_rows": self._max_rows,
+                "batch_rows_histogram": {
+                    "<={}".format(bucket): count for bucket, count in sorted(self._histogram.items())
+                },
+            }
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while rows < self.max_batch_rows:
+                try:
+                    remaining = deadline - time.monotonic()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            for raw in (False, True):
+                group = [(frame, future) for frame, is_raw, future in batch if is_raw is raw]
+                if group:
+                    self._predict_group(group, raw)
+            self._record(len(batch), rows)
+            if stop:
+                return
+
+    def _predict_group(self, group: List[Tuple[pd.DataFrame, Future]], raw: bool) -> None:
+        frames = [frame for frame, _ in group]
+        try:
+            if len(frames) == 1:
+                combined = frames[0]
+            elif not raw and self.service.feature_names is not None:
+                # Requests share the training column order, so stack the values directly, in
+                # the model's dtype so bool dummies next to floats do not yield an object array
+                dtype = self.service.input_dtype
+                combined = pd.DataFrame(np.vstack([frame.to_numpy(dtype=dtype) for frame in frames]),
+                                        columns=self.service.feature_names)
+            else:
+                combined = pd.concat(frames, ignore_index=True)
+            predictions = self.service.predict_prepared(combined, raw)
+            splits = np.cumsum([len(frame) for frame in frames])[:-1]
+            for (_, future), result in zip(group, np.split(predictions, splits)):
+                future.set_result(result)
+        except Exception as e:
+            logging.warning("Batched prediction failed, retrying the requests one by one: {}".format(e))
+            for frame, future in group:
+                try:
+                    future.set_result(self.service.predict_prepared(frame, raw))
+                except Exception as request_error:
+                    future.set_exception(request_error)
+
+    def _record(self, requests: int, rows: int) -> None:
+        with self._lock:
+            self._batches += 1
+            self._requests += requests
+            self._rows += rows
+            self._max_rows = max(self._max_rows, rows)
+            self._histogram[1 << max(rows - 1, 0).bit_length()] += 1
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """
+    Serves the MLflow scoring contract: POST /invocations returns {"predictions": [...]},
+    POST /predict does the same for the raw applicant fields. Requests may also be .npy
+    or Arrow IPC bodies and the predictions are returned in the format of the Accept
+    header, see parse_request and encode_response. GET /ping and /health report
+    liveness, GET /ready that the model is loaded and GET /metrics the cache and
+    micro-batching statistics
+    """
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, Nagle would hold the body for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    @property
+    def service(self) -> Optional[PredictionService]:
+        return getattr(self.server, "service", None)
+
+    def do_GET(self):
+        if self.path in ("/ping", "/health"):
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(200, self.service.metrics() if self.service is not None else {})
+        elif self.path == "/ready":
+            ready = self.service is not None and self.service.ready
+            self._send_json(200 if ready else 503, {"ready": ready})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path not in ("/invocations", "/predict"):
+            self._send_json(404, {"error": "Not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.service is None or not self.service.ready:
+            self._send_json(503, {"error": "Model is not loaded"})
+            return
+        try:
+            df = parse_request(body, self.headers.get("Content-Type", "application/json"))
+        except Exception as e:
+            self._send_json(400, {"error_code": "BAD_REQUEST", "message": str(e)})
+            return
+        try:
+            predictions = self.service.predict(df, raw=self.path == "/predict")
+        except SchemaValidationError as e:
+            logging.error("Error in prediction: {}".format(e))
+            self._send_json(400, {
+                "error_code": "BAD_REQUEST",
+                "message": "Data violates the schema",
+                "violations": {col: {key: int(count) for key, count in counts.items() if count}
+                               for col, counts in e.report.to_dict(orient="index").items()},
+            })
+            return
+        except Exception as e:
+            logging.error("Error in prediction: {}".format(e))
+            self._send_json(400, {"error_code": "BAD_REQUEST", "message": str(e)})
+            return
+        self._send(200, *encode_response(predictions, self.headers.get("Accept", "")))
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        self._send(status, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+
+class PredictionServer:
+    """
+    Multi-threaded HTTP prediction server running in this process
+    """
+    def __init__(self, service, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 handler: type = PredictionHandler):
+        self.service = service
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.service = service
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def serve_forever(self) -> None:
+        logging.info("Serving predictions at {}/invocations".format(self.url))
+        self.httpd.serve_forever()
+
+    def start(self) -> "PredictionServer":
+        """Serves from a background thread and returns immediately."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self.service.close()
+
+
+def serve(
+    model_uri: str,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    background: bool = False,
+    max_batch_rows: Optional[int] = None,
+    max_wait_ms: float = 2.0,
+    preprocessor_path: Optional[str] = None,
+    cache_size: int = 10_000,
+    cache_ttl: float = 300.0,
+) -> PredictionServer:
+    """
+    Loads the model once and serves it
+
+    Args:
+        model_uri: MLflow model URI, model directory or pickle file
+        host: interface to bind
+        port: port to bind
+        background: serve from a thread and return, instead of blocking
+        max_batch_rows: coalesce concurrent requests into batches of up to this many
+            rows, see MicroBatcher; every request is predicted on its own if None
+        max_wait_ms: longest a request waits for others to join its batch
+        preprocessor_path: preprocessor for raw requests on /predict, by default the one
+            logged next to the model
+        cache_size: rows whose predictions are cached, 0 disables the cache
+        cache_ttl: seconds a cached prediction is reused for
+    Returns:
+        PredictionServer: the running server
+    """
+    start = time.perf_counter()
+    cache = PredictionCache(cache_size, cache_ttl) if cache_size > 0 else None
+    service = PredictionService.from_uri(model_uri, preprocessor_path, cache)
+    if max_batch_rows is not None:
+        service = MicroBatcher(service, max_batch_rows, max_wait_ms)
+    server = PredictionServer(service, host, port)
+    logging.info("Prediction server ready in {:.3f}s".format(time.perf_counter() - start))
+    if background:
+        return server.start()
+    server.serve_forever()
+    return server
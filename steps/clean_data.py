@@ -1,34 +1,220 @@
 import logging
+import os
+import sys
 import pandas as pd
 from zenml import step
 from typing import Tuple
 from typing_extensions import Annotated
 
-from src.data_cleaning import DataCleaning, DataDivideStrategy, DataPreProcessStrategy
+import src.data_cleaning as data_cleaning_module
+import src.data_schema as data_schema_module
+import src.out_of_core as out_of_core_module
+from src.data_cleaning import (
+    DataCleaning,
+    DataDivideStrategy,
+    DataIndexSplitStrategy,
+    DataPreProcessor,
+    DataPreProcessStrategy,
+    feature_memory_report,
+    preprocessor_uri,
+)
+from src.dataset_cache import CACHE_DIR, DatasetCache, code_version
+from src.out_of_core import OutOfCoreDataPreProcessor
+from . import config as config_module
+from . import ingest_data as ingest_data_module
+from .config import CleanDataConfig
+from .ingest_data import IngestData
+
+def clean_and_split(
+    data: pd.DataFrame, config: CleanDataConfig
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series, DataPreProcessor]:
+    """Fits the preprocessor on the data and splits the cleaned data into train/test sets."""
+    # Preprocessing
+    preprocess_strategy = DataPreProcessStrategy(DataPreProcessor(
+        outlier_method=config.outlier_method,
+        compact=config.compact_dtypes,
+        sparse_min_categories=config.sparse_min_categories,
+    ))
+    data_cleaning = DataCleaning(data, preprocess_strategy)
+    preprocessed_data = data_cleaning.handle_data()
+    preprocessor = preprocess_strategy.preprocessor
+    preprocessor.save()
+    if config.compact_dtypes:
+        logging.info("Feature memory: {}".format(feature_memory_report(preprocessed_data)))
+
+    # Splitting
+    divide_strategy = DataDivideStrategy(DataIndexSplitStrategy(
+        stratify_bins=config.stratify_bins,
+        order_by=config.holdout_order_by,
+    ))
+    data_cleaning = DataCleaning(preprocessed_data, divide_strategy)
+    X_train, X_test, y_train, y_test = data_cleaning.handle_data()
+    return X_train, X_test, y_train, y_test, preprocessor
+
+def clean_and_split_out_of_core(
+    data_path: str, config: CleanDataConfig, output_path: str
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series, DataPreProcessor]:
+    """
+    Cleans the file at `data_path` chunk by chunk into the Parquet file `output_path`
+    and splits the cleaned rows read back from it into train/test sets. Only the raw
+    data is streamed; the cleaned feature matrix is loaded whole for the split.
+    """
+    if config.outlier_method != "vectorized":
+        raise ValueError("Out-of-core cleaning filters outliers with one combined mask, "
+                         "set outlier_method=\"vectorized\"")
+    if config.sparse_min_categories is not None:
+        raise ValueError("Out-of-core cleaning writes Parquet, which cannot store sparse columns, "
+                         "unset sparse_min_categories")
+    out_of_core = OutOfCoreDataPreProcessor(
+        lambda: IngestData(data_path, chunksize=config.chunksize).iter_chunks(),
+        compact=config.compact_dtypes,
+    )
+    preprocessor = out_of_core.fit_transform(output_path)
+    preprocessor.save()
+
+    divide_strategy = DataDivideStrategy(DataIndexSplitStrategy(
+        stratify_bins=config.stratify_bins,
+        order_by=config.holdout_order_by,
+    ))
+    data_cleaning = DataCleaning(pd.read_parquet(output_path), divide_strategy)
+    X_train, X_test, y_train, y_test = data_cleaning.handle_data()
+    return X_train, X_test, y_train, y_test, preprocessor
 
 @step
 def clean_df(
     data: pd.DataFrame,
+    config: CleanDataConfig = CleanDataConfig(),
 ) -> Tuple[
     Annotated[pd.DataFrame, "x_train"],
     Annotated[pd.DataFrame, "x_test"],
     Annotated[pd.Series, "y_train"],
     Annotated[pd.Series, "y_test"],
+    Annotated[DataPreProcessor, "preprocessor"],
 ]:
-    """Cleans and splits the data into train/test sets."""
+    """Cleans and splits the data into train/test sets and returns the fitted preprocessor."""
     try:
-        # Preprocessing
-        preprocess_strategy = DataPreProcessStrategy()
-        data_cleaning = DataCleaning(data, preprocess_strategy)
-        preprocessed_data = data_cleaning.handle_data()
-
-        # Splitting
-        divide_strategy = DataDivideStrategy()
-        data_cleaning = DataCleaning(preprocessed_data, divide_strategy)
-        X_train, X_test, y_train, y_test = data_cleaning.handle_data()
+        X_train, X_test, y_train, y_test, preprocessor = clean_and_split(data, config)
         logging.info("Data cleaning completed")
-        return X_train, X_test, y_train, y_test
+        return X_train, X_test, y_train, y_test, preprocessor
     except Exception as e:
 
         logging.error(f"Error in cleaning data: {e}")
-        raise e
\ No newline at end of file
+        raise e
+
+@step
+def ingest_and_clean_df(
+    data_path: str,
+    config: CleanDataConfig = CleanDataConfig(),
+    cache_dir: str = CACHE_DIR,
+    max_cache_bytes: int = 2 * 1024 ** 3,
+) -> Tuple[
+    Annotated[pd.DataFrame, "x_train"],
+    Annotated[pd.DataFrame, "x_test"],
+    Annotated[pd.Series, "y_train"],
+    Annotated[pd.Series, "y_test"],
+    Annotated[DataPreProcessor, "preprocessor"],
+]:
+    """
+    Ingests, cleans and splits the data, returning the cached split when neither the
+    raw file, the cleaning configuration nor the ingestion/cleaning code changed.
+    """
+    try:
+        cache = DatasetCache(cache_dir, max_bytes=max_cache_bytes)
+        version = code_version(
+            data_cleaning_module,
+            data_schema_module,
+            ingest_data_module,
+            out_of_core_module,
+            config_module,
+            sys.modules[__name__],
+        )
+        key = cache.key(data_path, config.dict(), version)
+        cached = cache.load(key)
+        if cached is not None:
+            X_train, X_test, y_train, y_test, preprocessor = cached
+            preprocessor.save()
+            return X_train, X_test, y_train, y_test, preprocessor
+
+        if config.out_of_core:
+            # The cleaned rows only live until they are split, the split itself is cached
+            cleaned_path = os.path.join(cache_dir, ".tmp-{}.parquet".format(key))
+            try:
+                X_train, X_test, y_train, y_test, preprocessor = clean_and_split_out_of_core(
+                    data_path, config, cleaned_path
+                )
+            finally:
+                if os.path.exists(cleaned_path):
+                    os.remove(cleaned_path)
+        else:
+            data = IngestData(data_path).get_data()
+            X_train, X_test, y_train, y_test, preprocessor = clean_and_split(data, config)
+        try:
+            cache.save(key, X_train, X_test, y_train, y_test, preprocessor)
+        except Exception as e:
+            logging.warning(f"Could not cache the cleaned data: {e}")
+        logging.info("Data cleaning completed")
+        return X_train, X_test, y_train, y_test, preprocessor
+    except Exception as e:
+        logging.error(f"Error in ingesting and cleaning data: {e}")
+        raise e
+
+@step
+def clean_df_out_of_core(
+    data_path: str,
+    output_path: str = os.path.join("data", "processed", "train_clean.parquet"),
+    chunksize: int = 100_000,
+) -> Tuple[
+    Annotated[str, "cleaned_data_path"],
+    Annotated[DataPreProcessor, "preprocessor"],
+]:
+    """
+    Cleans a dataset larger than memory in chunks: pass one fits the preprocessor from
+    mergeable statistics, pass two writes the cleaned rows to a Parquet file.
+    """
+    try:
+        out_of_core = OutOfCoreDataPreProcessor(
+            lambda: IngestData(data_path, chunksize=chunksize).iter_chunks()
+        )
+        preprocessor = out_of_core.fit_transform(output_path)
+        preprocessor.save()
+        logging.info("Out-of-core data cleaning completed")
+        return output_path, preprocessor
+    except Exception as e:
+        logging.error(f"Error in cleaning data out of core: {e}")
+        raise e
+
+@step
+def clean_increment_df(
+    data_path: str,
+    base_model_uri: str,
+    config: CleanDataConfig = CleanDataConfig(),
+) -> Tuple[
+    Annotated[pd.DataFrame, "x_train"],
+    Annotated[pd.DataFrame, "x_test"],
+    Annotated[pd.Series, "y_train"],
+    Annotated[pd.Series, "y_test"],
+    Annotated[DataPreProcessor, "preprocessor"],
+]:
+    """
+    Cleans and splits only the new rows at `data_path` with the preprocessor of the base
+    model, without refitting it, so the updated model sees the features it was trained on.
+    """
+    try:
+        import mlflow
+
+        path = mlflow.artifacts.download_artifacts(artifact_uri=preprocessor_uri(base_model_uri))
+        preprocessor = DataPreProcessor.load(path)
+        data = IngestData(data_path).get_data()
+        preprocessed_data = preprocessor.transform_training(data)
+        preprocessor.save()
+
+        divide_strategy = DataDivideStrategy(DataIndexSplitStrategy(
+            stratify_bins=config.stratify_bins,
+            order_by=config.holdout_order_by,
+        ))
+        X_train, X_test, y_train, y_test = DataCleaning(preprocessed_data, divide_strategy).handle_data()
+        logging.info("Cleaned {} new rows for the incremental update".format(len(preprocessed_data)))
+        return X_train, X_test, y_train, y_test, preprocessor
+    except Exception as e:
+        logging.error(f"Error in cleaning incremental data: {e}")
+        raise e
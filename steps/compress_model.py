@@ -0,0 +1,97 @@
+import logging
+import os
+import tempfile
+import time
+
+import mlflow
+import pandas as pd
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
+from sklearn.base import RegressorMixin
+from typing_extensions import Annotated
+from zenml import step
+from src.compiled_forest import FlatTreeEnsemble
+from src.model_compression import ModelCompressor, ModelVariants
+from .config import CompressionConfig
+from zenml.client import Client
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+
+@step(experiment_tracker=experiment_tracker.name)
+def compress_model(
+    model: RegressorMixin,
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: pd.Series,
+    y_test: pd.Series,
+    config: CompressionConfig = CompressionConfig(),
+    incremental: bool = False,
+) -> ModelVariants:
+    """
+    Builds pruned and distilled variants of the trained model and logs the R² and
+    performance profile (latency, throughput, size, peak memory) of each
+
+    Args:
+        model: trained model
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame,
+        y_train: pd.Series,
+        y_test: pd.Series,
+        config: variants to build
+        incremental: the model was updated with X_train holding only the new rows, so
+            no variant is built and the updated model is deployed as is
+    """
+    try:
+        compressor = ModelCompressor(
+            prune_estimators=config.prune_estimators,
+            prune_depths=config.prune_depths,
+            distill=config.distill,
+            distill_params=config.distill_params,
+            batch_sizes=config.batch_sizes,
+            latency_samples=config.latency_samples,
+        )
+        variants = compressor.compress(model, X_train, y_train, X_test, y_test, incremental=incremental)
+        run = mlflow.active_run() or mlflow.start_run()
+        timestamp = int(time.time() * 1000)
+        MlflowClient().log_batch(run.info.run_id, metrics=[
+            Metric("variant_{}_{}".format(name, key), value, timestamp, 0)
+            for name, scores in variants.report.items()
+            for key, value in scores.items()
+        ])
+        mlflow.log_dict(variants.report, "compression/report.json")
+        return variants
+    except Exception as e:
+        logging.error("Error in compressing model: {}".format(e))
+        raise e
+
+
+@step(experiment_tracker=experiment_tracker.name)
+def select_model(
+    variants: ModelVariants,
+    selected_variant: str,
+    compile_predictor: bool = True,
+) -> Annotated[RegressorMixin, "deployed_model"]:
+    """
+    Logs the variant chosen by deployment_trigger as the `deployed_model` MLflow model
+    and returns it
+
+    Args:
+        variants: variants built by compress_model
+        selected_variant: name of the variant to deploy
+        compile_predictor: also log a forest variant as a flat-array FlatTreeEnsemble
+            for low-latency scoring
+    """
+    try:
+        model = variants.models[selected_variant]
+        mlflow.sklearn.log_model(model, "deployed_model")
+        mlflow.log_param("deployed_variant", selected_variant)
+        if compile_predictor and hasattr(model, "estimators_"):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                compiled = FlatTreeEnsemble.from_model(model)
+                path = compiled.save(os.path.join(tmp_dir, "compiled_forest.npz"))
+                mlflow.log_artifact(path, artifact_path="compiled_model")
+        return model
+    except Exception as e:
+        logging.error("Error in selecting model: {}".format(e))
+        raise e
@@ -1,5 +1,97 @@
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, validator
 
 class ModelNameConfig(BaseModel):
     """Model Configurations"""
-    model_name: str = "RandomForest" 
\ No newline at end of file
+    model_name: str = "RandomForest" 
+    # Threads used for training, -1 uses all cores
+    n_jobs: int = -1
+    # Passed to the model constructor, e.g. {"n_estimators": 200, "max_depth": 12}
+    hyperparameters: Dict[str, Any] = {}
+    # Update the model at base_model_uri with the new data instead of training from scratch
+    incremental: bool = False
+    base_model_uri: Optional[str] = None
+    # Trees (or boosting rounds) added per incremental update
+    n_new_estimators: int = 50
+
+    @validator("hyperparameters")
+    def check_hyperparameters(cls, hyperparameters):
+        # Threads are set with n_jobs, which is passed next to the hyperparameters
+        if "n_jobs" in hyperparameters:
+            raise ValueError("Set n_jobs on ModelNameConfig, not in hyperparameters")
+        return hyperparameters
+
+
+class CleanDataConfig(BaseModel):
+    """Data Cleaning Configurations"""
+    # "sequential" reproduces the per-column IQR filter, "vectorized" uses one combined mask
+    outlier_method: str = "sequential"
+    # float32 numeric features, and sparse one-hots for categoricals with many categories
+    compact_dtypes: bool = False
+    sparse_min_categories: Optional[int] = None
+    # Stratify the split on quantile bins of the target, or hold out the last rows
+    # ordered by a column of the cleaned data ("index" for the row order of the file,
+    # "Customer ID" is dropped before the split) instead of a shuffled split
+    stratify_bins: Optional[int] = None
+    holdout_order_by: Optional[str] = None
+    # Clean the file in chunks with the two-pass OutOfCoreDataPreProcessor (approximate
+    # quantiles, requires outlier_method="vectorized" and no sparse_min_categories) and
+    # split the Parquet file it writes: the raw file is never loaded whole, but the
+    # cleaned feature matrix is read back in full for the split and must fit in memory
+    out_of_core: bool = False
+    chunksize: int = 100_000
+
+class TuningConfig(BaseModel):
+    """Hyperparameter Search Configurations"""
+    # Random candidates; successive halving keeps the best 1/eta per rung
+    n_candidates: int = 27
+    eta: int = 3
+    # Fraction of the training rows the first rung fits on
+    min_resource: float = 0.1
+    # Budget: total fits and wall-clock seconds, None for unlimited
+    max_trials: Optional[int] = None
+    time_budget: Optional[float] = 600.0
+    # Stop when a rung's best R² improves by less than this on the previous rung
+    min_improvement: Optional[float] = None
+    validation_fraction: float = 0.2
+    # Worker processes, -1 uses all cores
+    n_jobs: int = -1
+    random_state: Optional[int] = 42
+    # Overrides the default search space of the model, e.g. {"max_depth": [8, 12]}
+    search_space: Optional[Dict[str, List[Any]]] = None
+
+
+class CompressionConfig(BaseModel):
+    """Model Compression Configurations"""
+    # Forests are also truncated to their first n trees
+    prune_estimators: List[int] = [25, 50]
+    # The model is refitted with each max_depth
+    prune_depths: List[int] = [12]
+    # Distill into a HistGradientBoosting student fitted on the model's predictions
+    distill: bool = True
+    distill_params: Dict[str, Any] = {"max_iter": 300}
+    # Throughput batch sizes and timed single-row predictions of each variant's profile
+    batch_sizes: List[int] = [1, 100, 1000, 10000]
+    latency_samples: int = 200
+
+
+class FeatureSelectionConfig(BaseModel):
+    """Feature Selection Configurations"""
+    # Features whose permutation importance (mean R² drop) is below this are dropped
+    threshold: float = 0.001
+    n_repeats: int = 5
+    validation_fraction: float = 0.2
+    # Worker processes permuting features, -1 uses all cores
+    n_jobs: int = -1
+    random_state: Optional[int] = 42
+
+
+class CrossValidationConfig(BaseModel):
+    """Cross-Validation Configurations"""
+    n_splits: int = 5
+    # Stratify the folds on quantile bins of the target
+    stratify_bins: Optional[int] = None
+    # Worker processes fitting folds, -1 uses all cores
+    n_jobs: int = -1
+    random_state: Optional[int] = 42
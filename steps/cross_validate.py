@@ -0,0 +1,66 @@
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import mlflow
+import pandas as pd
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
+from typing_extensions import Annotated
+from zenml import step
+from src.cross_validation import ParallelKFold
+from .config import CrossValidationConfig, ModelNameConfig
+from zenml.client import Client
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+
+@step(experiment_tracker=experiment_tracker.name)
+def cross_validate(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    model_config: ModelNameConfig,
+    config: CrossValidationConfig = CrossValidationConfig(),
+    hyperparameters: Optional[Dict[str, Any]] = None,
+) -> Tuple[
+    Annotated[float, "cv_r2_mean"],
+    Annotated[float, "cv_r2_std"],
+]:
+    """
+    K-fold cross-validates the model on the training split, fitting the folds in
+    parallel processes over memory-mapped data, and logs the per-fold metrics, their
+    mean and standard deviation, and the metrics pooled over all out-of-fold predictions
+
+    Args:
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        model_config: model to cross-validate
+        config: folds and parallelism
+        hyperparameters: tuned hyperparameters from tune_model, overriding model_config.hyperparameters
+    """
+    try:
+        cv = ParallelKFold(
+            model_config.model_name,
+            hyperparameters={**model_config.hyperparameters, **(hyperparameters or {})},
+            n_splits=config.n_splits,
+            stratify_bins=config.stratify_bins,
+            n_jobs=config.n_jobs,
+            random_state=config.random_state,
+        )
+        summary = cv.run(X_train, y_train)
+        run = mlflow.active_run() or mlflow.start_run()
+        timestamp = int(time.time() * 1000)
+        metrics = [Metric(key, value, timestamp, 0) for key, value in summary.items()]
+        # Metrics of the out-of-fold predictions of all folds pooled together
+        metrics += [Metric("cv_{}_pooled".format(key), value, timestamp, 0) for key, value in cv.pooled_scores.items()]
+        # Per-fold values use the fold number as the metric step
+        metrics += [
+            Metric("cv_fold_{}".format(key), value, timestamp, fold)
+            for fold, scores in enumerate(cv.fold_scores)
+            for key, value in scores.items()
+        ]
+        MlflowClient().log_batch(run.info.run_id, metrics=metrics)
+        return summary["cv_r2_mean"], summary["cv_r2_std"]
+    except Exception as e:
+        logging.error("Error in cross-validating model: {}".format(e))
+        raise e
@@ -1,13 +1,52 @@
+import logging
+from typing import Optional, Tuple
+
+from typing_extensions import Annotated
 from zenml.steps import step
 from pydantic import BaseModel
 
+from src.model_compression import ModelVariants
+
 class DeploymentTriggerConfig(BaseModel):
     min_accuracy: float = 0.70
+    # Largest R² loss accepted for a smaller variant of the model
+    max_r2_drop: float = 0.01
+    # Gate on the lower bound of the bootstrap R² interval instead of the point estimate
+    use_lower_bound: bool = False
+    # Serving budgets of the deployed variant, None disables the check
+    max_latency_p99_ms: Optional[float] = None
+    max_size_bytes: Optional[float] = None
+    min_throughput_rows_per_s: Optional[float] = None
 
 @step
 def deployment_trigger(
-    accuracy: float,
-    config: DeploymentTriggerConfig
-) -> bool:
-    """Return True if accuracy exceeds the threshold to deploy the model."""
-    return accuracy >= config.min_accuracy
\ No newline at end of file
+    config: DeploymentTriggerConfig,
+    variants: ModelVariants,
+    r2_lower: Optional[float] = None,
+    incremental: bool = False,
+) -> Tuple[
+    Annotated[bool, "deploy_decision"],
+    Annotated[str, "selected_variant"],
+]:
+    """
+    Pick the smallest variant whose R² is within `max_r2_drop` of the full model and that
+    meets the latency, size and throughput budgets, and return True if its accuracy
+    exceeds the threshold to deploy it. With `use_lower_bound`, the accuracy is the full
+    model's bootstrap lower bound shifted by the variant's R² difference to the full model.
+    With `incremental`, the test set only holds the new rows, too few to vouch for a
+    variant refitted on them, so only variants derived from the updated model compete.
+    """
+    selected = variants.smallest_within(
+        config.max_r2_drop,
+        max_latency_p99_ms=config.max_latency_p99_ms,
+        max_size_bytes=config.max_size_bytes,
+        min_throughput_rows_per_s=config.min_throughput_rows_per_s,
+        include_refitted=not incremental,
+    )
+    if selected is None:
+        logging.warning("No model variant meets the serving budgets: {}".format(variants.report))
+        return False, variants.smallest_within(config.max_r2_drop, include_refitted=not incremental)
+    accuracy = variants.report[selected]["r2"]
+    if config.use_lower_bound and r2_lower is not None:
+        accuracy = r2_lower + accuracy - variants.report[ModelVariants.FULL]["r2"]
+    return accuracy >= config.min_accuracy, selected
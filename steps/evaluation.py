@@ -1,12 +1,20 @@
 import logging
-from typing import Tuple
+from typing import Optional, Tuple
 
 import mlflow
+import numpy as np
 import pandas as pd
 from sklearn.base import RegressorMixin
 from typing_extensions import Annotated
 from zenml import step
-from src.evaluation import MSE, R2, RMSE
+from src.data_cleaning import DataPreProcessor
+from src.evaluation import (
+    RegressionMetrics,
+    applicant_segments,
+    bootstrap_intervals,
+    performance_profile,
+    sliced_metrics,
+)
 from zenml.client import Client
 
 experiment_tracker = Client().active_stack.experiment_tracker
@@ -15,31 +23,70 @@ experiment_tracker = Client().active_stack.experiment_tracker
 def evaluate_model(model: RegressorMixin,
     X_test: pd.DataFrame,
     y_test: pd.DataFrame,
+    preprocessor: Optional[DataPreProcessor] = None,
+    chunk_size: int = 100_000,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    bootstrap_n_jobs: int = 1,
+    latency_samples: int = 200,
 ) -> Tuple[
     Annotated[float, "r2"],
     Annotated[float, "rmse"],
+    Annotated[float, "r2_lower"],
 ]:
     """"
     Evaluate the model on the ingested data.
     Args:
-        df: the ingested data
+        model: trained model
+        X_test: test features, scored in chunks of `chunk_size` rows
+        y_test: test labels
+        preprocessor: DataPreProcessor used to recover the applicant segments of X_test
+        chunk_size: rows predicted at a time
+        n_resamples: bootstrap resamples of the R2 and RMSE confidence intervals, 0 skips them
+        confidence: coverage of the intervals
+        bootstrap_n_jobs: worker processes for the resamples of large test sets
+        latency_samples: single-row predictions timed for the latency percentiles, 0 skips
+            the performance profile
+    Returns:
+        r2, rmse and the lower bound of the R2 interval (r2 itself without resamples)
     """
     try:
-        prediction = model.predict(X_test)
-        mse_class = MSE()
-        mse = mse_class.calculate_scores(y_test, prediction)
-        mlflow.log_metric("mse", mse)
+        y_values = np.asarray(y_test).ravel()
+        predictions = np.concatenate([
+            np.asarray(model.predict(X_test[start:start + chunk_size]), dtype=np.float64).ravel()
+            for start in range(0, len(X_test), chunk_size)
+        ])
+        metrics = RegressionMetrics.from_chunks(
+            (y_values[start:start + chunk_size], predictions[start:start + chunk_size])
+            for start in range(0, len(y_values), chunk_size)
+        )
+        scores = metrics.scores()
+        r2_lower = scores["r2"]
+        if n_resamples:
+            intervals = bootstrap_intervals(
+                y_values, predictions, n_resamples=n_resamples, confidence=confidence,
+                random_state=42, n_jobs=bootstrap_n_jobs,
+            )
+            r2_lower = intervals["r2"][0]
+            scores.update({
+                "r2_ci_low": intervals["r2"][0],
+                "r2_ci_high": intervals["r2"][1],
+                "rmse_ci_low": intervals["rmse"][0],
+                "rmse_ci_high": intervals["rmse"][1],
+            })
+        if latency_samples:
+            scores.update(performance_profile(model, X_test, latency_samples=latency_samples))
+        # One batched request for every metric
+        mlflow.log_metrics(scores)
+        if preprocessor is not None:
+            segments = applicant_segments(X_test, preprocessor)
+            if segments:
+                table = sliced_metrics(y_values, predictions, segments)
+                mlflow.log_table(data=table, artifact_file="segments/metrics.json")
+                logging.info("Segment metrics:\n{}".format(table.to_string(index=False)))
+        logging.info("Model evaluation completed with {}".format(scores))
 
-        r2_class = R2()
-        r2 = r2_class.calculate_scores(y_test, prediction)
-        mlflow.log_metric("r2", r2)
-        
-        rmse_class = RMSE()
-        rmse = rmse_class.calculate_scores(y_test, prediction)
-        mlflow.log_metric("rmse", rmse)
-        logging.info("Model evaluation completed with R2: {}, RMSE: {}".format(r2, rmse))
-        
-        return r2, rmse
+        return scores["r2"], scores["rmse"], r2_lower
     except Exception as e:
         logging.error("Error in evaluating model: {}".format(e))
-        raise e
\ No newline at end of file
+        raise e
@@ -1,40 +1,138 @@
 import logging
+import os
+from typing import Iterator, List, Optional
 
 import pandas as pd
+from pandas.api.types import union_categoricals
 from zenml import step
 
+from src.data_schema import LOAN_SCHEMA_VALIDATOR, RAW_DTYPES, USE_COLUMNS
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".feather", ".arrow", ".ipc")
+
+
 class IngestData:
     """
     Ingesting the data from the data path
     """
-    def __init__(self, data_path: str):
+    def __init__(
+        self,
+        data_path: str,
+        columns: Optional[List[str]] = None,
+        chunksize: Optional[int] = None,
+        memory_map: bool = True,
+        validate: bool = True,
+    ):
         """
-        Args: 
-            data_path: path to the data
+        Args:
+            data_path: path to the data (CSV, Parquet, Feather or Arrow IPC)
+            columns: columns to read, defaults to the columns the pipeline uses
+            chunksize: number of rows read at a time, None reads the file in one go
+            memory_map: memory-map Parquet/Feather/Arrow files instead of copying them
+            validate: validate every chunk against the loan schema as soon as it is read
         """
         self.data_path = data_path
+        self.columns = columns if columns is not None else USE_COLUMNS
+        self.chunksize = chunksize
+        self.memory_map = memory_map
+        self.validate = validate
 
-    def get_data(self):
+    def get_data(self) -> pd.DataFrame:
         """
         Ingesting the data from the data path
         """
         logging.info(f"Ingesting data from {self.data_path}")
-        return pd.read_csv(self.data_path)
+        if self.chunksize is None and not self.data_path.endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS):
+            return self._prepare_chunk(
+                pd.read_csv(self.data_path, usecols=lambda col: col in self.columns, dtype=self._dtypes())
+            )
+        return self._concat(list(self.iter_chunks()))
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Yields the data in chunks of `chunksize` rows with the schema dtypes applied
+        """
+        extension = os.path.splitext(self.data_path)[1].lower()
+        if extension in PARQUET_EXTENSIONS:
+            yield from self._iter_parquet()
+        elif extension in ARROW_EXTENSIONS:
+            yield from self._iter_arrow()
+        else:
+            reader = pd.read_csv(
+                self.data_path,
+                usecols=lambda col: col in self.columns,
+                dtype=self._dtypes(),
+                chunksize=self.chunksize or 100_000,
+            )
+            with reader:
+                for chunk in reader:
+                    yield self._prepare_chunk(chunk)
+
+    def _iter_parquet(self) -> Iterator[pd.DataFrame]:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(self.data_path, memory_map=self.memory_map)
+        columns = [col for col in self.columns if col in parquet_file.schema_arrow.names]
+        if self.chunksize is None:
+            yield self._prepare_chunk(parquet_file.read(columns=columns).to_pandas())
+            return
+        for batch in parquet_file.iter_batches(batch_size=self.chunksize, columns=columns):
+            yield self._prepare_chunk(batch.to_pandas())
+
+    def _iter_arrow(self) -> Iterator[pd.DataFrame]:
+        import pyarrow as pa
+
+        source = pa.memory_map(self.data_path) if self.memory_map else pa.OSFile(self.data_path)
+        with source:
+            reader = pa.ipc.open_file(source)
+            columns = [col for col in self.columns if col in reader.schema.names]
+            if self.chunksize is None:
+                yield self._prepare_chunk(reader.read_all().select(columns).to_pandas())
+                return
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i).select(columns)
+                for start in range(0, batch.num_rows, self.chunksize):
+                    yield self._prepare_chunk(batch.slice(start, self.chunksize).to_pandas())
+
+    def _dtypes(self) -> dict:
+        return {col: RAW_DTYPES[col] for col in self.columns if col in RAW_DTYPES}
+
+    def _prepare_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        dtypes = {col: dtype for col, dtype in self._dtypes().items() if col in df.columns and df[col].dtype != dtype}
+        df = df.astype(dtypes) if dtypes else df
+        if self.validate:
+            LOAN_SCHEMA_VALIDATOR.check(df, self.columns)
+        return df
+
+    @staticmethod
+    def _concat(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+        if len(chunks) == 1:
+            return chunks[0]
+        # Unify the categories of every chunk so the concatenated columns stay categorical
+        for col in chunks[0].columns:
+            if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+                categories = union_categoricals([chunk[col] for chunk in chunks], ignore_order=True).categories
+                for chunk in chunks:
+                    chunk[col] = chunk[col].cat.set_categories(categories)
+        return pd.concat(chunks, ignore_index=True)
 
 @step
-def ingest_df(data_path: str) -> pd.DataFrame:
+def ingest_df(data_path: str, chunksize: Optional[int] = None, validate: bool = True) -> pd.DataFrame:
     """
-    Ingesting the data from the data path
+    Ingesting the data from the data path, failing fast if it violates the loan schema
 
     Args:
         data_path: path to the data
+        chunksize: number of rows read at a time, None reads the file in one go
+        validate: validate the data against the loan schema
     Returns
         pd.DataFrame: the ingested data
     """
     try:
-        ingest_data = IngestData(data_path)
+        ingest_data = IngestData(data_path, chunksize=chunksize, validate=validate)
         df = ingest_data.get_data()
         return df
     except Exception as e:
         logging.error(f"Error while ingesting data: {e}")
-        raise e
\ No newline at end of file
+        raise e
@@ -1,9 +1,13 @@
 import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
 
 import mlflow
 import pandas as pd
 from zenml import step
-from src.model_dev import RandomForestModel
+from src.data_cleaning import DataPreProcessor
+from src.model_dev import MODELS, IncrementalModel
 from sklearn.base import RegressorMixin
 from .config import ModelNameConfig
 from zenml.client import Client
@@ -18,24 +22,48 @@ def train_model(
     y_train: pd.Series,
     y_test: pd.Series,
     config: ModelNameConfig,
+    preprocessor: DataPreProcessor,
+    hyperparameters: Optional[Dict[str, Any]] = None,
 ) -> RegressorMixin:
     """
-    Trains the model on the ingested data
+    Trains the model on the ingested data and logs the fitted preprocessor
+    alongside it so serving applies the exact training-time features
 
     Args:
         X_train: pd.DataFrame,
         X_test: pd.DataFrame,
         y_train: pd.Series,
         y_test: pd.Series,
+        preprocessor: DataPreProcessor fitted in clean_df, or the base model's one when incremental
+        hyperparameters: tuned hyperparameters from tune_model, overriding config.hyperparameters
     """
     try:
-        model = None
-        if config.model_name == "RandomForest":
+        if config.model_name not in MODELS:
+            raise ValueError("Model {} not supported".format(config.model_name))
+        if config.model_name == "XGBoost":
+            mlflow.xgboost.autolog()
+        else:
             mlflow.sklearn.autolog()
-            model = RandomForestModel()
-            trained_model = model.train(X_train, y_train)
-            return trained_model
+        model = MODELS[config.model_name]()
+        if config.incremental and config.base_model_uri:
+            if not isinstance(model, IncrementalModel):
+                raise ValueError("Model {} does not support incremental training".format(config.model_name))
+            # select_model logs every deployed variant with the sklearn flavour
+            base_model = mlflow.sklearn.load_model(config.base_model_uri)
+            if not model.can_update(base_model):
+                raise ValueError("The model at {} is a {}, which {} cannot update, train from scratch".format(
+                    config.base_model_uri, type(base_model).__name__, config.model_name))
+            trained_model = model.update(
+                base_model, X_train, y_train, n_new_estimators=config.n_new_estimators, n_jobs=config.n_jobs
+            )
+            mlflow.log_param("base_model_uri", config.base_model_uri)
         else:
-            raise ValueError("Model {} not supported".format(config.model_name))
+            params = {**config.hyperparameters, **(hyperparameters or {})}
+            trained_model = model.train(X_train, y_train, n_jobs=config.n_jobs, **params)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = preprocessor.save(os.path.join(tmp_dir, "preprocessor.joblib"))
+            mlflow.log_artifact(path, artifact_path="preprocessor")
+            mlflow.log_dict({"features": list(X_train.columns)}, "preprocessor/features.json")
+        return trained_model
     except Exception as e:
         logging.error("Error in training model: {}".format(e))
\ No newline at end of file
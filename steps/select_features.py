@@ -0,0 +1,66 @@
+import copy
+import logging
+from typing import Tuple
+
+import mlflow
+import pandas as pd
+from typing_extensions import Annotated
+from zenml import step
+from src.data_cleaning import DataPreProcessor
+from src.feature_selection import PermutationFeatureSelector
+from .config import FeatureSelectionConfig, ModelNameConfig
+from zenml.client import Client
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+
+@step(experiment_tracker=experiment_tracker.name)
+def select_features(
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: pd.Series,
+    preprocessor: DataPreProcessor,
+    model_config: ModelNameConfig,
+    config: FeatureSelectionConfig = FeatureSelectionConfig(),
+) -> Tuple[
+    Annotated[pd.DataFrame, "x_train"],
+    Annotated[pd.DataFrame, "x_test"],
+    Annotated[DataPreProcessor, "preprocessor"],
+]:
+    """
+    Drops redundant one-hot columns and features with a permutation importance below
+    the threshold, and returns a preprocessor that only emits the selected columns so
+    the reduced column list travels with the model
+
+    Args:
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame,
+        y_train: pd.Series,
+        preprocessor: DataPreProcessor fitted in clean_df
+        model_config: model the importances are computed with
+        config: importance threshold and parallelism
+    """
+    try:
+        selector = PermutationFeatureSelector(
+            model_name=model_config.model_name,
+            hyperparameters=model_config.hyperparameters,
+            threshold=config.threshold,
+            n_repeats=config.n_repeats,
+            validation_fraction=config.validation_fraction,
+            n_jobs=config.n_jobs,
+            random_state=config.random_state,
+        )
+        selected = selector.fit(X_train, y_train)
+        selected_preprocessor = copy.deepcopy(preprocessor)
+        selected_preprocessor.select_features(selected)
+        selected_preprocessor.save()
+        mlflow.log_dict({
+            "selected": selected,
+            "dropped": selector.dropped,
+            "importances": selector.importances,
+        }, "feature_selection/report.json")
+        mlflow.log_metric("n_features", len(selected))
+        return X_train[selected], X_test[selected], selected_preprocessor
+    except Exception as e:
+        logging.error("Error in selecting features: {}".format(e))
+        raise e
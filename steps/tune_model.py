@@ -0,0 +1,83 @@
+import logging
+import time
+from typing import Any, Dict, List
+
+import mlflow
+import pandas as pd
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+from zenml import step
+from src.model_tuning import SuccessiveHalvingSearch
+from .config import ModelNameConfig, TuningConfig
+from zenml.client import Client
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+
+def batch_trial_logger(run_id: str):
+    """
+    Returns a callback logging each batch of trials to the run with a single
+    log_batch request, using the trial number as the metric step
+    """
+    client = MlflowClient()
+
+    def log_trials(trials: List[Dict[str, Any]]) -> None:
+        timestamp = int(time.time() * 1000)
+        metrics = []
+        for trial in trials:
+            for key in ("r2", "fit_seconds", "rows", "rung"):
+                metrics.append(Metric("tuning_{}".format(key), float(trial[key]), timestamp, trial["trial"]))
+        client.log_batch(run_id, metrics=metrics)
+
+    return log_trials
+
+
+@step(experiment_tracker=experiment_tracker.name)
+def tune_model(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    model_config: ModelNameConfig,
+    config: TuningConfig = TuningConfig(),
+) -> Dict[str, Any]:
+    """
+    Searches the model's hyperparameters with parallel successive halving on the
+    training split, under the configured trial and wall-clock budget
+
+    Args:
+        X_train: pd.DataFrame,
+        y_train: pd.Series,
+        model_config: model to tune, its hyperparameters are passed to every trial and
+            left out of the default search space
+        config: search budget and space
+    Returns:
+        Dict[str, Any]: hyperparameters for train_model
+    """
+    try:
+        run = mlflow.active_run() or mlflow.start_run()
+        search = SuccessiveHalvingSearch(
+            model_config.model_name,
+            search_space=config.search_space,
+            n_candidates=config.n_candidates,
+            eta=config.eta,
+            min_resource=config.min_resource,
+            max_trials=config.max_trials,
+            time_budget=config.time_budget,
+            min_improvement=config.min_improvement,
+            validation_fraction=config.validation_fraction,
+            n_jobs=config.n_jobs,
+            random_state=config.random_state,
+            log_trials=batch_trial_logger(run.info.run_id),
+            base_params=model_config.hyperparameters,
+        )
+        best_params = search.fit(X_train, y_train)
+        MlflowClient().log_batch(
+            run.info.run_id,
+            metrics=[Metric("tuning_best_r2", float(search.best_score_), int(time.time() * 1000), 0)],
+            params=[Param("tuned_{}".format(k), str(v)) for k, v in best_params.items()],
+        )
+        mlflow.log_dict({"trials": search.trials}, "tuning/trials.json")
+        logging.info("Hyperparameter search completed after {} trials".format(len(search.trials)))
+        return best_params
+    except Exception as e:
+        logging.error("Error in tuning model: {}".format(e))
+        raise e
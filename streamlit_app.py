@@ -1,27 +1,10 @@
 import streamlit as st
-import pandas as pd
 import requests
 
 st.set_page_config(page_title="Loan Amount Prediction", layout="centered")
 st.title("🏦 Loan Sanction Amount Predictor")
 
 
-# --- Expected columns from the model ---
-expected_columns = [
-    'Age', 'Income (USD)', 'Loan Amount Request (USD)', 'Current Loan Expenses (USD)',
-    'Dependents', 'Credit Score', 'No. of Defaults', 'Property Age', 'Property Type',
-    'Co-Applicant', 'Property Price',
-    'Gender_F', 'Gender_M',
-    'Income Stability_High', 'Income Stability_Low',
-    'Profession_Commercial associate', 'Profession_Pensioner',
-    'Profession_State servant', 'Profession_Working',
-    'Location_Rural', 'Location_Semi-Urban', 'Location_Urban',
-    'Expense Type 1_N', 'Expense Type 1_Y',
-    'Expense Type 2_N', 'Expense Type 2_Y',
-    'Has Active Credit Card_Active', 'Has Active Credit Card_Inactive', 'Has Active Credit Card_Unpossessed',
-    'Property Location_Rural', 'Property Location_Semi-Urban', 'Property Location_Urban'
-]
-
 # --- Collect input ---
 st.header("🔍 Applicant & Property Information")
 
@@ -48,44 +31,37 @@ expense_2 = st.radio("Has Expense Type 2?", ["Y", "N"])
 credit_card = st.selectbox("Active Credit Card", ["Active", "Inactive", "Unpossessed"])
 property_location = st.selectbox("Property Location", ["Urban", "Semi-Urban", "Rural"])
 
-# --- Build input dictionary ---
+# --- Build the raw applicant record, the server encodes it ---
 input_data = {
+    'Gender': gender,
     'Age': age,
     'Income (USD)': income,
+    'Income Stability': income_stability,
+    'Profession': profession,
+    'Location': location,
     'Loan Amount Request (USD)': loan_request,
     'Current Loan Expenses (USD)': loan_expenses,
+    'Expense Type 1': expense_1,
+    'Expense Type 2': expense_2,
     'Dependents': dependents,
     'Credit Score': credit_score,
     'No. of Defaults': defaults,
-    'Property Age': property_age,
+    'Has Active Credit Card': credit_card,
+    # The training data records the property age in days
+    'Property Age': property_age * 365,
     'Property Type': property_type,
+    'Property Location': property_location,
     'Co-Applicant': co_applicant,
     'Property Price': property_price,
-    f'Gender_{gender}': 1,
-    f'Income Stability_{income_stability}': 1,
-    f'Profession_{profession}': 1,
-    f'Location_{location}': 1,
-    f'Expense Type 1_{expense_1}': 1,
-    f'Expense Type 2_{expense_2}': 1,
-    f'Has Active Credit Card_{credit_card}': 1,
-    f'Property Location_{property_location}': 1,
 }
 
-# --- Fill missing columns ---
-for col in expected_columns:
-    if col not in input_data:
-        input_data[col] = 0
-
-# --- Format input for model ---
-df = pd.DataFrame([input_data])[expected_columns]
-
 # --- Predict ---
 if st.button("Predict Loan Amount"):
     try:
         response = requests.post(
-            url="http://127.0.0.1:5005/invocations",
+            url="http://127.0.0.1:5005/predict",
             headers={"Content-Type": "application/json"},
-            json={"dataframe_records": df.to_dict(orient="records")}
+            json={"dataframe_records": [input_data]}
         )
         if response.status_code == 200:
             prediction = response.json()["predictions"][0]
@@ -97,4 +73,4 @@ if st.button("Predict Loan Amount"):
 
 # --- Footer ---
 st.markdown("---")
-st.markdown("🔧 **MLflow Model Server:** `http://127.0.0.1:5005/invocations`")
\ No newline at end of file
+st.markdown("🔧 **Model Server:** `http://127.0.0.1:5005/predict`")
\ No newline at end of file
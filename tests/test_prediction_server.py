@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from src.data_cleaning import TARGET_COLUMN, DataPreProcessor
+from src.data_schema import SchemaValidationError
+from src.prediction_server import PredictionService, parse_request
+
+
+@pytest.fixture(scope="module")
+def raw_data() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 500
+    data = pd.DataFrame({
+        "Gender": rng.choice(["F", "M"], n),
+        "Age": rng.integers(18, 70, n),
+        "Income (USD)": rng.lognormal(8, 0.5, n),
+        "Income Stability": rng.choice(["High", "Low"], n),
+        "Profession": rng.choice(["Working", "State servant", "Pensioner", "Commercial associate"], n),
+        "Location": rng.choice(["Rural", "Semi-Urban", "Urban"], n),
+        "Loan Amount Request (USD)": rng.uniform(1e4, 1e5, n),
+        "Current Loan Expenses (USD)": rng.uniform(0, 500, n),
+        "Expense Type 1": rng.choice(["N", "Y"], n),
+        "Expense Type 2": rng.choice(["N", "Y"], n),
+        "Dependents": rng.integers(1, 4, n).astype(float),
+        "Credit Score": rng.uniform(600, 900, n),
+        "No. of Defaults": rng.integers(0, 2, n),
+        "Has Active Credit Card": rng.choice(["Active", "Inactive", "Unpossessed"], n),
+        "Property Age": rng.uniform(100, 5000, n),
+        "Property Type": rng.integers(1, 5, n),
+        "Property Location": rng.choice(["Rural", "Semi-Urban", "Urban"], n),
+        "Co-Applicant": rng.integers(0, 2, n),
+        "Property Price": rng.uniform(5e4, 3e5, n),
+    })
+    data[TARGET_COLUMN] = data["Loan Amount Request (USD)"] * 0.7 + rng.normal(0, 1000, n)
+    return data
+
+
+@pytest.fixture(scope="module")
+def service(raw_data: pd.DataFrame) -> PredictionService:
+    preprocessor = DataPreProcessor()
+    features = preprocessor.fit_transform(raw_data)
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(
+        features.drop(columns=[TARGET_COLUMN]), features[TARGET_COLUMN]
+    )
+    return PredictionService(model, preprocessor)
+
+
+def raw_request(records) -> pd.DataFrame:
+    body = json.dumps({"dataframe_records": records}).encode()
+    return parse_request(body, "application/json")
+
+
+def test_single_row_with_null_numeric_field(raw_data, service):
+    records = json.loads(raw_data.drop(columns=[TARGET_COLUMN]).iloc[:2].to_json(orient="records"))
+    records[0]["Income (USD)"] = None
+
+    single = service.predict(raw_request(records[:1]), raw=True)
+    pair = service.predict(raw_request(records), raw=True)
+
+    assert single.shape == (1,)
+    assert single[0] == pytest.approx(pair[0])
+
+
+def test_unknown_category_is_rejected(raw_data, service):
+    records = json.loads(raw_data.drop(columns=[TARGET_COLUMN]).iloc[:1].to_json(orient="records"))
+    records[0]["Location"] = "urbn"
+
+    with pytest.raises(SchemaValidationError):
+        service.predict(raw_request(records), raw=True)